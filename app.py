@@ -3,7 +3,26 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objs as go
 
+from capacidad import calcular_capacidad, construir_modelo
+from graficos import PRESUPUESTO_PUNTOS, barras, linea, lineas_alineadas, reducir
+from ingesta import hash_contenido, leer_tabla
+from inverso_wip import capacidad_minima, wip_inicial_maximo
+from lineas import ESTACIONES_EM, ESTACIONES_SURF
+from logs_maquinas import estaciones_empiricas, importar_logs, oee_empirico
+from montecarlo_wip import DISTRIBUCIONES_CAPACIDAD, DISTRIBUCIONES_ENTRADAS, PERCENTILES, simular_montecarlo
+from optimizador import configuracion_minima, frontera_pareto
+from perfilado import ACTIVO_POR_DEFECTO, Perfilador
+from planificador_turnos import OPCIONES_TURNOS, planificar_turnos
+from plantas import DIRECTORIO_PLANTAS, evaluar_plantas
+from series import VARIABLES_WIP, AlmacenSeries, leer_csv_series
+from simulacion_eventos import simular_linea
+from simulacion_horaria import calendario_turnos, expandir_diario, resumen_diario, simular_horario
+from simulacion_wip import UMBRAL_WIP, barrido_parametros, dia_estabilizacion, output_objetivo, simular_wip
+
 st.set_page_config(page_title="🚀 Dashboard de Capacidad y Simulación WIP", layout="wide")
+# Perfilado opcional (CAPACIDAD_PERFILADO=1 o ?perfilado=1 en la URL): un perfilador por corrida.
+# La memoria (tracemalloc, global al proceso) solo se mide con la variable de entorno del servidor.
+perf = Perfilador(activo=ACTIVO_POR_DEFECTO or st.query_params.get("perfilado") == "1")
 st.markdown("""
 <style>
 h1, h2, h3, h4 { color: #003366; }
@@ -19,40 +38,9 @@ with colA:
 with colB:
     st.markdown("<h1 style='margin-top:10px;'>Dashboard de Capacidad</h1>", unsafe_allow_html=True)
 
-tab = st.radio(
-    "Selecciona el proceso:", 
-    options=["SURF (Superficies)", "E&M", "Simulación WIP"], 
-    horizontal=True
-)
-
-# ========== BLOQUE SURF ==========
-if tab == "SURF (Superficies)":
-    st.markdown("---")
-    st.markdown("## 🚀 Superficies - Capacidad, Bottleneck y Simulación Industrial")
-
-    st.sidebar.header("🔧 Configuración de Estaciones y Máquinas (SURF)")
-    default_stations = [
-        {"name": "Encintado", "icon": "🟦", "color": "#1f3b6f", "machines": [
-            {"type": "Encintadora Automática", "count": 1, "capacity": 300.0},
-            {"type": "Encintado Manual", "count": 1, "capacity": 0.0}]},
-        {"name": "Bloqueo Digital", "icon": "🟩", "color": "#27ae60", "machines": [
-            {"type": "PRA", "count": 3, "capacity": 80.0}]},
-        {"name": "Generado Digital", "icon": "🟫", "color": "#8d6748", "machines": [
-            {"type": "Orbit", "count": 3, "capacity": 77.0}]},
-        {"name": "Laser", "icon": "🟨", "color": "#f7e017", "machines": [
-            {"type": "Automático", "count": 1, "capacity": 100.0},
-            {"type": "Manual", "count": 1, "capacity": 110.0}]},
-        {"name": "Pulido", "icon": "🟪", "color": "#7d3fc7", "machines": [
-            {"type": "Duo Flex", "count": 2, "capacity": 30.0},
-            {"type": "DLP", "count": 6, "capacity": 27.0}]},
-        {"name": "Desbloqueo", "icon": "⬛", "color": "#222222", "machines": [
-            {"type": "Manual", "count": 1, "capacity": 120},
-            {"type": "Desblocker", "count": 1, "capacity": 120}]},
-        {"name": "Calidad", "icon": "⬜", "color": "#eaeaea", "machines": [
-            {"type": "Foco Vision", "count": 1, "capacity": 60.0},
-            {"type": "Promapper", "count": 1, "capacity": 110.0}]}
-    ]
 
+def configurar_estaciones(default_stations, prefijo_key, capacidad_min):
+    # Widgets de la barra lateral: cantidad y capacidad de cada máquina
     stations = []
     for station in default_stations:
         st.sidebar.subheader(f"{station['icon']} {station['name']}")
@@ -60,17 +48,276 @@ if tab == "SURF (Superficies)":
         for machine in station["machines"]:
             count = st.sidebar.number_input(
                 f"{station['name']} - {machine['type']} (Cantidad)", min_value=1, value=machine["count"],
-                key=f"{station['name']}_{machine['type']}_count"
+                key=f"{prefijo_key}{station['name']}_{machine['type']}_count"
             )
             capacity = st.sidebar.number_input(
-                f"{station['name']} - {machine['type']} (Capacidad lentes/hora)", min_value=0.0, value=float(machine["capacity"]),
-                key=f"{station['name']}_{machine['type']}_capacity"
+                f"{station['name']} - {machine['type']} (Capacidad lentes/hora)", min_value=capacidad_min, value=float(machine["capacity"]),
+                key=f"{prefijo_key}{station['name']}_{machine['type']}_capacity"
             )
             machines.append({"type": machine["type"], "count": count, "capacity": capacity})
         stations.append({"name": station["name"], "icon": station["icon"], "color": station["color"], "machines": machines})
+    return stations
+
+
+def ventana_grafico(fechas, key):
+    # Con más puntos que el presupuesto, rango de fechas a graficar: la reducción LTTB se aplica
+    # dentro de la ventana, así que achicarla devuelve más detalle (equivale a refinar con zoom).
+    fechas = pd.DatetimeIndex(fechas)
+    if len(fechas) <= PRESUPUESTO_PUNTOS:
+        return slice(None)
+    inicio, fin = st.slider(
+        "Ventana del gráfico", min_value=fechas[0].to_pydatetime(), max_value=fechas[-1].to_pydatetime(),
+        value=(fechas[0].to_pydatetime(), fechas[-1].to_pydatetime()), format="DD/MM/YY HH:mm", key=key
+    )
+    return slice(fechas.searchsorted(inicio), fechas.searchsorted(fin, side="right"))
+
+
+@st.cache_data(max_entries=32)
+def tabla_capacidad(stations, line_oee, num_turnos, horas_turno, scrap_rate):
+    # Capacidad por estación con el motor compartido (capacidad.py)
+    modelo = construir_modelo({"linea": stations})
+    res = calcular_capacidad(modelo, line_oee, num_turnos, horas_turno, scrap_rate)
+    df = pd.DataFrame({
+        "Estación": [f"{icono} {nombre}" for icono, nombre in zip(modelo.iconos, modelo.estaciones)],
+        "Color": modelo.colores,
+        "Capacidad hora (teórica)": res.cap_hora,
+        "Capacidad diaria (real)": res.cap_diaria
+    })
+    return df, res
+
+
+@st.cache_data(max_entries=32)
+def figuras_capacidad(df):
+    # Barras (lentes/hora) y embudo (lentes/día) por estación; se reconstruyen solo si cambia la tabla
+    bar_colors = df["Color"].tolist()
+    bar_names = df["Estación"].tolist()
+    fig = go.Figure(
+        go.Bar(
+            x=bar_names,
+            y=df["Capacidad hora (teórica)"],
+            marker_color=bar_colors,
+            text=np.round(df["Capacidad hora (teórica)"], 1),
+            textposition='outside'
+        )
+    )
+    fig.update_layout(title="Capacidad por Estación (lentes/hora)", yaxis_title="Lentes/hora", xaxis_title="Estación")
+
+    fig2 = go.Figure(
+        go.Funnel(
+            y=bar_names,
+            x=df["Capacidad diaria (real)"],
+            textinfo="value+percent initial",
+            marker={"color": bar_colors}
+        )
+    )
+    fig2.update_layout(title="Flujo y Bottleneck (lentes/día)", funnelmode="stack")
+    return fig, fig2
+
+
+@st.cache_data(max_entries=4, show_spinner="Procesando log de máquinas por trozos...")
+def importar_logs_cacheado(clave, _datos, nombre, columnas):
+    # `clave` (hash del contenido) identifica el archivo; los bytes no se vuelven a hashear
+    return importar_logs(_datos, nombre, ESTACIONES_SURF, **dict(columnas))
+
+
+@st.cache_resource
+def abrir_almacen_series():
+    # Un solo objeto por servidor; la primera vez carga la semilla de diciembre
+    almacen = AlmacenSeries()
+    almacen.sembrar()
+    return almacen
+
+
+@st.cache_data(max_entries=8, show_spinner="Simulando la rejilla de escenarios...")
+def barrido_cacheado(base, param_x, valores_x, param_y, valores_y, entradas, es_domingo, outputs_fijos, umbral):
+    return barrido_parametros(base, param_x, valores_x, param_y, valores_y, entradas, es_domingo, outputs_fijos, umbral=umbral)
+
+
+@st.cache_data(max_entries=8, show_spinner="Simulando réplicas Monte Carlo...")
+def montecarlo_cacheado(entradas, dia_semana, outputs_fijos, parametros, opciones, umbral):
+    return simular_montecarlo(entradas, dia_semana, outputs_fijos, parametros, umbral=umbral, **dict(opciones))
+
+
+@st.cache_data(max_entries=16)
+def figura_horaria(horas, wip, llegadas, estaciones, colores, titulo):
+    # Área apilada de WIP por estación (miles de puntos por traza): se memoiza por sus datos.
+    # stackgroup no existe en Scattergl: se reducen todas las estaciones con los índices LTTB del total.
+    x, wip_red = reducir(horas, list(wip), referencia=wip.sum(axis=0))
+    fig_h = go.Figure()
+    for k, nombre in enumerate(estaciones):
+        fig_h.add_trace(go.Scatter(x=x, y=wip_red[k], name=nombre, mode="lines", stackgroup="wip",
+                                   line=dict(width=0.5, color=colores[k])))
+    fig_h.add_trace(barras(horas, llegadas, name="Entradas por hora", marker=dict(color="#2ca02c"), opacity=0.4))
+    fig_h.update_layout(title=titulo, xaxis_title="Hora", yaxis_title="Lentes", template="plotly_white")
+    return fig_h
+
+
+@st.cache_data(max_entries=16, show_spinner="Optimizando inversión...")
+def optimizar_inversion(stations, costos, maximos, objetivo, cap_max, line_oee, num_turnos, horas_turno, scrap_rate):
+    modelo = construir_modelo({"linea": stations})
+    opt = configuracion_minima(modelo, costos, objetivo, line_oee, num_turnos, horas_turno, scrap_rate, max_adicional=maximos)
+    frontera = frontera_pareto(modelo, costos, cap_max, line_oee, num_turnos, horas_turno, scrap_rate, max_adicional=maximos)
+    return opt, frontera
+
+
+@st.fragment
+def panel_optimizador(stations, line_oee, num_turnos, horas_turno, scrap_rate, capacidad_actual, prefijo_key):
+    # Costo por tipo de máquina -> configuración mínima y frontera costo/capacidad.
+    # Fragmento: editar costos u objetivo solo vuelve a ejecutar este panel.
+    modelo = construir_modelo({"linea": stations})
+    with st.expander("💰 Optimizador de inversión en máquinas"):
+        objetivo = st.number_input(
+            "Capacidad diaria (real) objetivo (lentes/día)", min_value=0.0,
+            value=float(np.ceil(capacidad_actual * 1.2)), step=50.0, key=f"{prefijo_key}opt_objetivo"
+        )
+        df_costos = st.data_editor(
+            pd.DataFrame({
+                "Estación": [modelo.estaciones[k] for k in modelo.estacion_maquina],
+                "Máquina": modelo.tipos,
+                "Costo unitario": 1000.0,
+                "Máx. adicionales": 10,
+            }),
+            disabled=["Estación", "Máquina"], hide_index=True, use_container_width=True, key=f"{prefijo_key}opt_costos"
+        )
+        costos = df_costos["Costo unitario"].to_numpy(dtype=float)
+        maximos = df_costos["Máx. adicionales"].to_numpy(dtype=float)
+        maximos = np.where(np.isnan(maximos), -1, maximos)
+
+        opt, frontera = optimizar_inversion(
+            stations, costos, maximos, objetivo, max(objetivo, capacidad_actual) * 1.5, line_oee, num_turnos, horas_turno, scrap_rate
+        )
+        if not opt.factible:
+            st.warning("No se alcanza el objetivo con los máximos de máquinas adicionales indicados.")
+        else:
+            colo1, colo2 = st.columns(2)
+            colo1.metric("Inversión mínima", f"{opt.costo:,.0f}")
+            colo2.metric("Capacidad diaria resultante", f"{opt.cap_linea[0]:.0f} lentes/día")
+            compras = df_costos[["Estación", "Máquina"]].assign(**{"Comprar": opt.adicionales, "Cantidad final": opt.cantidad.astype(int)})
+            st.dataframe(compras[compras["Comprar"] > 0], hide_index=True, use_container_width=True)
+
+        if frontera:
+            fig_frontera = go.Figure(go.Scatter(
+                x=[p[0] for p in frontera], y=[p[1] for p in frontera], mode="lines+markers", line_shape="hv",
+                line=dict(color="#1f77b4"), name="Frontera de Pareto"
+            ))
+            fig_frontera.add_hline(y=objetivo, line_dash="dash", line_color="red", annotation_text="Objetivo")
+            fig_frontera.update_layout(title="Frontera costo vs. capacidad diaria de la línea", xaxis_title="Inversión", yaxis_title="Lentes/día", template="plotly_white")
+            st.plotly_chart(fig_frontera, use_container_width=True)
+
+
+@st.fragment
+def panel_eventos(stations, line_oee):
+    # Fragmento: el formulario y los resultados de la simulación de eventos no vuelven a ejecutar el resto del tab
+    st.markdown("---")
+    st.markdown("### ⏱️ Simulación de eventos discretos (buffers, bloqueo e inanición)")
+    with st.form("simulacion_eventos_surf"):
+        cole1, cole2, cole3 = st.columns(3)
+        with cole1:
+            des_lentes = st.select_slider("Lentes a simular", options=[10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000], value=100_000)
+            des_lentes_job = st.number_input("Lentes por trabajo (bandeja)", min_value=1, max_value=4, value=2)
+        with cole2:
+            des_llegada = st.number_input("Llegadas (lentes/hora, 0 = línea saturada)", min_value=0.0, value=0.0, step=10.0)
+            des_buffer = st.number_input("Buffer entre estaciones (trabajos)", min_value=0, max_value=500, value=20)
+        with cole3:
+            des_cv = st.slider("Variabilidad del tiempo de servicio (CV)", min_value=0.0, max_value=1.0, value=0.2, step=0.05)
+            des_semilla = st.number_input("Semilla", min_value=0, value=0, step=1)
+        ejecutar_des = st.form_submit_button("Ejecutar simulación")
+
+    if ejecutar_des:
+        try:
+            st.session_state["des_surf"] = simular_linea(
+                stations, oee=line_oee, lentes=des_lentes, lentes_por_job=des_lentes_job,
+                tasa_llegada=des_llegada or None, buffer=des_buffer, cv_servicio=des_cv, semilla=int(des_semilla)
+            )
+        except ValueError as e:
+            st.session_state.pop("des_surf", None)
+            st.error(f"No se pudo simular: {e}")
+    des = st.session_state.get("des_surf")
+    if des is not None:
+        cold1, cold2, cold3 = st.columns(3)
+        cold1.metric("Throughput simulado", f"{des.throughput:.1f} lentes/hora")
+        cold2.metric("Lead time P50 / P90", f"{np.percentile(des.lead_time, 50):.2f} / {np.percentile(des.lead_time, 90):.2f} h")
+        cold3.metric("Horas productivas simuladas", f"{des.horas:.0f} h")
+
+        df_des = pd.DataFrame({
+            "Estación": des.estaciones,
+            "Utilización": np.round(des.utilizacion, 3),
+            "Bloqueo": np.round(des.bloqueo, 3),
+            "Inanición": np.round(des.inanicion, 3),
+            "Cola promedio (trabajos)": np.round(des.colas.mean(axis=0), 1),
+        })
+        fig_des = go.Figure()
+        for k, nombre in enumerate(des.estaciones[1:], start=1):
+            fig_des.add_trace(linea(des.tiempos_muestreo, des.colas[:, k], name=nombre, mode="lines"))
+        fig_des.update_layout(title="Cola en el buffer de entrada de cada estación", xaxis_title="Horas", yaxis_title="Trabajos en cola", template="plotly_white")
+
+        cold4, cold5 = st.columns([1, 2])
+        with cold4:
+            st.dataframe(df_des, use_container_width=True)
+        with cold5:
+            st.plotly_chart(fig_des, use_container_width=True)
+
+
+def panel_perfilado(perf):
+    # Tabla de secciones de la corrida (solo si el perfilado está activo)
+    if not perf.activo:
+        return
+    with st.expander("🐞 Perfilado de la corrida"):
+        if perf.registros:
+            df_perf = pd.DataFrame(perf.registros)[["seccion", "tiempo_s", "memoria_pico_bytes", "payload_bytes"]]
+            df_perf["tiempo_ms"] = (df_perf.pop("tiempo_s") * 1000).round(2)
+            df_perf["memoria pico (KiB)"] = (df_perf.pop("memoria_pico_bytes") / 1024).round(1)
+            df_perf["payload (KiB)"] = (df_perf.pop("payload_bytes") / 1024).round(1)
+            st.dataframe(df_perf, hide_index=True, use_container_width=True)
+        st.caption(f"Corrida {perf.corrida}: {perf.total() * 1000:.0f} ms en total. Log: {perf.ruta_log or 'sin escritura'}")
+        st.caption("Las reejecuciones de fragmentos no se muestran aquí: quedan en el log con el id de esta corrida."
+                   + ("" if perf.medir_memoria else " Memoria sin medir (solo con CAPACIDAD_PERFILADO=1 en el servidor)."))
+
+
+tab = st.radio(
+    "Selecciona el proceso:", 
+    options=["SURF (Superficies)", "E&M", "Simulación WIP", "Plantas (rollup)"], 
+    horizontal=True
+)
+perf.etiqueta = tab
+
+# ========== BLOQUE SURF ==========
+if tab == "SURF (Superficies)":
+    st.markdown("---")
+    st.markdown("## 🚀 Superficies - Capacidad, Bottleneck y Simulación Industrial")
+
+    st.sidebar.header("🧾 Log de máquinas (capacidades empíricas)")
+    archivo_log = st.sidebar.file_uploader("Cargar log de eventos de máquinas (CSV/Excel)", type=["csv", "xlsx"], key="log_maquinas")
+    res_logs = None
+    usar_empiricas = False
+    if archivo_log:
+        with st.sidebar.expander("Columnas del log"):
+            columnas_log = (
+                ("col_fecha", st.text_input("Fecha-hora", value="fecha")),
+                ("col_maquina", st.text_input("Tipo de máquina", value="maquina")),
+                ("col_estacion", st.text_input("Estación (opcional)", value="estacion") or None),
+                ("col_lentes", st.text_input("Lentes por evento (opcional)", value="lentes") or None),
+                ("col_equipo", st.text_input("Id de equipo (opcional)", value="") or None),
+            )
+        try:
+            datos_log = archivo_log.getvalue()
+            res_logs = importar_logs_cacheado(hash_contenido(datos_log), datos_log, archivo_log.name, columnas_log)
+            usar_empiricas = st.sidebar.checkbox("Usar capacidades y OEE empíricos", value=True)
+        except (ValueError, KeyError) as e:
+            st.sidebar.error(f"No se pudo leer el log: {e}")
+
+    st.sidebar.header("🔧 Configuración de Estaciones y Máquinas (SURF)")
+    default_stations = estaciones_empiricas(ESTACIONES_SURF, res_logs) if usar_empiricas else ESTACIONES_SURF
+    # P95 empírico + OEE contra ese P95: el P95 ya trae las pérdidas, el OEE nominal las contaría dos veces
+    oee_inicial = oee_empirico(res_logs, base="empirica") if usar_empiricas else None
+    oee_inicial = 0.80 if oee_inicial is None else float(np.clip(round(oee_inicial, 2), 0.5, 1.0))
+
+    # Prefijo distinto: los widgets se recrean con los valores empíricos como punto de partida
+    with perf.seccion("widgets barra lateral"):
+        stations = configurar_estaciones(default_stations, prefijo_key="emp_" if usar_empiricas else "", capacidad_min=0.0)
 
     st.sidebar.header("📊 Parámetros globales")
-    line_oee = st.sidebar.slider("OEE de la línea", min_value=0.5, max_value=1.0, value=0.80, step=0.01)
+    line_oee = st.sidebar.slider("OEE de la línea", min_value=0.5, max_value=1.0, value=oee_inicial, step=0.01)
     num_turnos = st.sidebar.number_input("Número de turnos", min_value=1, max_value=4, value=3)
     horas_turno = st.sidebar.number_input("Horas por turno", min_value=4, max_value=12, value=7)
     scrap_rate = st.sidebar.slider("Tasa de scrap (%)", min_value=0.0, max_value=0.2, value=0.00, step=0.01)
@@ -78,59 +325,46 @@ if tab == "SURF (Superficies)":
     st.sidebar.header("📂 Importar datos reales")
     uploaded_file = st.sidebar.file_uploader("Cargar archivo Excel/CSV (opcional)", type=["xlsx", "csv"])
     if uploaded_file:
-        df_input = pd.read_excel(uploaded_file) if uploaded_file.name.endswith("xlsx") else pd.read_csv(uploaded_file)
-        st.write("📊 Datos importados:")
-        st.dataframe(df_input)
-
-    station_capacity = []
-    for station in stations:
-        total_capacity = sum([m["count"] * m["capacity"] for m in station["machines"]]) * line_oee
-        capacidad_diaria = total_capacity * num_turnos * horas_turno * (1 - scrap_rate)
-        station_capacity.append({
-            "Estación": f"{station['icon']} {station['name']}",
-            "Color": station["color"],
-            "Capacidad hora (teórica)": total_capacity,
-            "Capacidad diaria (real)": capacidad_diaria
-        })
-
-    df = pd.DataFrame(station_capacity)
-    capacidad_linea_diaria = df["Capacidad diaria (real)"].min()
-
-    bar_colors = df["Color"].tolist()
-    bar_names = df["Estación"].tolist()
+        # Tipos explícitos: códigos con ceros a la izquierda, ids, etc. no se infieren como números
+        columnas_texto = st.sidebar.text_input("Columnas como texto (separadas por coma)", value="")
+        dtypes_input = {c.strip(): "string" for c in columnas_texto.split(",") if c.strip()}
+        try:
+            df_input = leer_tabla(uploaded_file.getvalue(), uploaded_file.name, dtypes=dtypes_input or None)
+            st.write(f"📊 Datos importados ({len(df_input):,} filas; vista previa de las primeras {min(len(df_input), 1000):,}):")
+            st.dataframe(df_input.head(1000))
+        except (ValueError, KeyError) as e:
+            st.error(f"No se pudo leer el archivo: {e}")
+
+    if res_logs is not None:
+        st.markdown("### 🧾 Throughput real desde el log de máquinas")
+        st.caption(f"{res_logs.filas_leidas:,} filas leídas por trozos; {res_logs.filas_sin_mapear:,} sin estación/máquina reconocida o sin fecha.")
+        st.dataframe(res_logs.tabla.round(3), hide_index=True, use_container_width=True)
+        por_estacion = res_logs.por_hora.groupby(["Hora", "Estación"], sort=True)["Lentes"].sum().unstack(fill_value=0)
+        fig_log = go.Figure([linea(por_estacion.index.to_numpy(), por_estacion[e].to_numpy(), name=e, mode="lines") for e in por_estacion.columns])
+        fig_log.update_layout(title="Lentes por hora y estación (log)", xaxis_title="Hora", yaxis_title="Lentes/hora", template="plotly_white")
+        st.plotly_chart(fig_log, use_container_width=True)
+
+    with perf.seccion("tabla de capacidad"):
+        df, res_capacidad = tabla_capacidad(stations, line_oee, num_turnos, horas_turno, scrap_rate)
+    capacidad_linea_diaria = res_capacidad.cap_linea[0]
 
     st.markdown("### 🔍 Visualización de Capacidad y Bottleneck")
     col1, col2 = st.columns([2, 1])
 
     with col1:
         st.subheader("⚙️ Capacidad por Estación")
-        fig = go.Figure(
-            go.Bar(
-                x=bar_names,
-                y=df["Capacidad hora (teórica)"],
-                marker_color=bar_colors,
-                text=np.round(df["Capacidad hora (teórica)"], 1),
-                textposition='outside'
-            )
-        )
-        fig.update_layout(title="Capacidad por Estación (lentes/hora)", yaxis_title="Lentes/hora", xaxis_title="Estación")
+        with perf.seccion("figuras de capacidad") as s:
+            fig, fig2 = figuras_capacidad(df)
+            s.payload(fig)
+            s.payload(fig2)
         st.plotly_chart(fig, use_container_width=True)
         
-        fig2 = go.Figure(
-            go.Funnel(
-                y=bar_names,
-                x=df["Capacidad diaria (real)"],
-                textinfo="value+percent initial",
-                marker={"color": bar_colors}
-            )
-        )
-        fig2.update_layout(title="Flujo y Bottleneck (lentes/día)", funnelmode="stack")
         st.plotly_chart(fig2, use_container_width=True)
 
     with col2:
         st.subheader("📈 KPIs y Simulación")
         st.markdown(f"<div class='big-metric'>Cap. diaria (bottleneck): {int(capacidad_linea_diaria)} lentes/día</div>", unsafe_allow_html=True)
-        bottleneck = df.loc[df["Capacidad diaria (real)"].idxmin()]
+        bottleneck = df.loc[res_capacidad.cuello[0]]
         st.markdown(f"<div class='metric-info'>🔴 <b>Cuello de botella:</b> {bottleneck['Estación']} ({int(bottleneck['Capacidad diaria (real)'])} lentes/día)</div>", unsafe_allow_html=True)
 
         st.write("🕒 **Simulación de reducción de turnos**")
@@ -141,15 +375,25 @@ if tab == "SURF (Superficies)":
         st.write("📝 **Resumen de parámetros**")
         st.dataframe(df.drop("Color", axis=1), use_container_width=True)
 
+    with perf.seccion("optimizador"):
+        panel_optimizador(stations, line_oee, num_turnos, horas_turno, scrap_rate, capacidad_linea_diaria, prefijo_key="")
+
+    panel_eventos(stations, line_oee)
+
     st.markdown("---")
     st.header("💾 Exportar análisis")
-    st.download_button("Descargar tabla de capacidad en CSV", data=df.drop("Color", axis=1).to_csv(index=False).encode('utf-8'), file_name='capacidad_linea.csv', mime='text/csv')
+    with perf.seccion("CSV de descarga") as s:
+        csv_capacidad = s.payload(df.drop("Color", axis=1).to_csv(index=False).encode('utf-8'))
+    st.download_button("Descargar tabla de capacidad en CSV", data=csv_capacidad, file_name='capacidad_linea.csv', mime='text/csv')
 
     with st.expander("¿Cómo se calculan los KPIs?"):
         st.markdown(f"""
         - **Capacidad hora (teórica):** ∑ (máquinas × capacidad) por estación × OEE de la línea ({line_oee:.2f}).
         - **Capacidad diaria (real):** Capacidad hora × número de turnos × horas por turno × (1 - scrap).
         - **Cuello de botella:** Estación con menor capacidad diaria.
+        - **Log de máquinas:** se lee por trozos y se agrega a lentes por máquina y hora; la capacidad empírica es el P95 de lentes/hora por unidad y, al usarla, el OEE es el throughput medio sobre ese P95 (la tabla también muestra el OEE contra la capacidad nominal).
+        - **Optimizador de inversión:** busca las máquinas adicionales de menor costo para que todas las estaciones alcancen el objetivo diario (ramificación y acotamiento por estación) y traza la frontera costo vs. capacidad.
+        - **Simulación de eventos discretos:** cada máquina es un servidor con buffers finitos entre estaciones; una máquina se bloquea si el buffer siguiente está lleno y queda en inanición si no tiene trabajo.
         
         """)
 
@@ -167,34 +411,10 @@ elif tab == "E&M":
     st.markdown("## 🏭 E&M - Capacidad, Bottleneck y Simulación Industrial")
 
     st.sidebar.header("🔧 Configuración de Estaciones y Máquinas E&M")
-    default_stations_em = [
-        {"name": "Anaquel", "icon": "🔲", "color": "#8e44ad", "machines": [
-            {"type": "Manual", "count": 1, "capacity": 8*60.0}]},
-        {"name": "Bloqueo", "icon": "🟦", "color": "#2980b9", "machines": [
-            {"type": "Manual", "count": 1, "capacity": 4*60.0}]},
-        {"name": "Corte", "icon": "✂️", "color": "#27ae60", "machines": [
-            {"type": "Bisphera", "count": 1, "capacity": 109.0},
-            {"type": "ES4", "count": 2, "capacity": 34.0},
-            {"type": "MEI641", "count": 1, "capacity": 74.0}]},
-        {"name": "Remate", "icon": "🟨", "color": "#f4d03f", "machines": [
-            {"type": "Manual", "count": 1, "capacity": 64.0}]}
-    ]
-
-    stations_em = []
-    for station in default_stations_em:
-        st.sidebar.subheader(f"{station['icon']} {station['name']}")
-        machines = []
-        for machine in station["machines"]:
-            count = st.sidebar.number_input(
-                f"{station['name']} - {machine['type']} (Cantidad)", min_value=1, value=machine["count"],
-                key=f"E&M_{station['name']}_{machine['type']}_count"
-            )
-            capacity = st.sidebar.number_input(
-                f"{station['name']} - {machine['type']} (Capacidad lentes/hora)", min_value=1.0, value=float(machine["capacity"]),
-                key=f"E&M_{station['name']}_{machine['type']}_capacity"
-            )
-            machines.append({"type": machine["type"], "count": count, "capacity": capacity})
-        stations_em.append({"name": station["name"], "icon": station["icon"], "color": station["color"], "machines": machines})
+    default_stations_em = ESTACIONES_EM
+
+    with perf.seccion("widgets barra lateral"):
+        stations_em = configurar_estaciones(default_stations_em, prefijo_key="E&M_", capacidad_min=1.0)
 
     st.sidebar.header("📊 Parámetros globales")
     line_oee = st.sidebar.slider("OEE de la línea", min_value=0.5, max_value=1.0, value=0.85, step=0.01)
@@ -202,54 +422,27 @@ elif tab == "E&M":
     horas_turno = st.sidebar.number_input("Horas por turno", min_value=4, max_value=12, value=8)
     scrap_rate = st.sidebar.slider("Tasa de scrap (%)", min_value=0.0, max_value=0.2, value=0.05, step=0.01)
 
-    station_capacity_em = []
-    for station in stations_em:
-        total_capacity = sum([m["count"] * m["capacity"] for m in station["machines"]]) * line_oee
-        capacidad_diaria = total_capacity * num_turnos * horas_turno * (1 - scrap_rate)
-        station_capacity_em.append({
-            "Estación": f"{station['icon']} {station['name']}",
-            "Color": station["color"],
-            "Capacidad hora (teórica)": total_capacity,
-            "Capacidad diaria (real)": capacidad_diaria
-        })
-    df_em = pd.DataFrame(station_capacity_em)
-    capacidad_linea_diaria_em = df_em["Capacidad diaria (real)"].min()
-
-    bar_colors = df_em["Color"].tolist()
-    bar_names = df_em["Estación"].tolist()
+    with perf.seccion("tabla de capacidad"):
+        df_em, res_capacidad_em = tabla_capacidad(stations_em, line_oee, num_turnos, horas_turno, scrap_rate)
+    capacidad_linea_diaria_em = res_capacidad_em.cap_linea[0]
 
     st.markdown("### 🔍 Visualización de Capacidad y Bottleneck")
     col1, col2 = st.columns([2, 1])
 
     with col1:
         st.subheader("⚙️ Capacidad por Estación")
-        fig = go.Figure(
-            go.Bar(
-                x=bar_names,
-                y=df_em["Capacidad hora (teórica)"],
-                marker_color=bar_colors,
-                text=np.round(df_em["Capacidad hora (teórica)"], 1),
-                textposition='outside'
-            )
-        )
-        fig.update_layout(title="Capacidad por Estación (lentes/hora)", yaxis_title="Lentes/hora", xaxis_title="Estación")
+        with perf.seccion("figuras de capacidad") as s:
+            fig, fig2 = figuras_capacidad(df_em)
+            s.payload(fig)
+            s.payload(fig2)
         st.plotly_chart(fig, use_container_width=True)
 
-        fig2 = go.Figure(
-            go.Funnel(
-                y=bar_names,
-                x=df_em["Capacidad diaria (real)"],
-                textinfo="value+percent initial",
-                marker={"color": bar_colors}
-            )
-        )
-        fig2.update_layout(title="Flujo y Bottleneck (lentes/día)", funnelmode="stack")
         st.plotly_chart(fig2, use_container_width=True)
 
     with col2:
         st.subheader("📈 KPIs y Simulación")
         st.markdown(f"<div class='big-metric'>Cap. diaria (bottleneck): {int(capacidad_linea_diaria_em)} lentes/día</div>", unsafe_allow_html=True)
-        bottleneck = df_em.loc[df_em["Capacidad diaria (real)"].idxmin()]
+        bottleneck = df_em.loc[res_capacidad_em.cuello[0]]
         st.markdown(f"<div class='metric-info'>🔴 <b>Cuello de botella:</b> {bottleneck['Estación']} ({int(bottleneck['Capacidad diaria (real)'])} lentes/día)</div>", unsafe_allow_html=True)
 
         st.write("🕒 **Simulación de reducción de turnos**")
@@ -260,15 +453,21 @@ elif tab == "E&M":
         st.write("📝 **Resumen de parámetros**")
         st.dataframe(df_em.drop("Color", axis=1), use_container_width=True)
 
+    with perf.seccion("optimizador"):
+        panel_optimizador(stations_em, line_oee, num_turnos, horas_turno, scrap_rate, capacidad_linea_diaria_em, prefijo_key="E&M_")
+
     st.markdown("---")
     st.header("💾 Exportar análisis")
-    st.download_button("Descargar tabla de capacidad en CSV", data=df_em.drop("Color", axis=1).to_csv(index=False).encode('utf-8'), file_name='capacidad_em.csv', mime='text/csv')
+    with perf.seccion("CSV de descarga") as s:
+        csv_capacidad = s.payload(df_em.drop("Color", axis=1).to_csv(index=False).encode('utf-8'))
+    st.download_button("Descargar tabla de capacidad en CSV", data=csv_capacidad, file_name='capacidad_em.csv', mime='text/csv')
 
     with st.expander("¿Cómo se calculan los KPIs?"):
         st.markdown(f"""
         - **Capacidad hora (teórica):** ∑ (máquinas × capacidad) por estación × OEE de la línea ({line_oee:.2f}).
         - **Capacidad diaria (real):** Capacidad hora × número de turnos × horas por turno × (1 - scrap).
         - **Cuello de botella:** Estación con menor capacidad diaria.
+        - **Optimizador de inversión:** busca las máquinas adicionales de menor costo para que todas las estaciones alcancen el objetivo diario (ramificación y acotamiento por estación) y traza la frontera costo vs. capacidad.
         - Puedes importar datos reales y ajustar todos los parámetros para simular escenarios de mejora industrial.
         """)
 
@@ -284,170 +483,469 @@ elif tab == "E&M":
 elif tab == "Simulación WIP":
     st.title("Simulación WIP Variable")
 
-    dias = [
-        "1-dic","2-dic","3-dic","4-dic","5-dic","6-dic","7-dic","8-dic","9-dic","10-dic","11-dic","12-dic","13-dic","14-dic",
-        "15-dic","16-dic","17-dic","18-dic","19-dic","20-dic","21-dic","22-dic","23-dic","24-dic","25-dic","26-dic","27-dic","28-dic"
-    ]
-    mes_map = {
-        'ene':'Jan', 'feb':'Feb', 'mar':'Mar', 'abr':'Apr', 'may':'May', 'jun':'Jun',
-        'jul':'Jul', 'ago':'Aug', 'sep':'Sep', 'oct':'Oct', 'nov':'Nov', 'dic':'Dec'
-    }
-    def traduce_fecha(fecha_str, year=2025):
-        dia, mes = fecha_str.split('-')
-        mes_en = mes_map[mes.lower()]
-        return f"{dia}-{mes_en}-{year}"
-    dias_en = [traduce_fecha(d) for d in dias]
-    dias_fecha = pd.to_datetime(dias_en, format="%d-%b-%Y")
-
-    # Entradas (actualizadas por ti)
-    entradas_raw = [
-        905,1355,1382,1363,1514,2106,315,873,942,817,760,797,813,243,880,790,900,662,748,620,99,668,742,623,0,641,400,94
-    ]
-    entradas = np.array(entradas_raw, dtype=float)
+    # Series de entradas y output planificado desde el almacén local (series.py)
+    almacen = abrir_almacen_series()
+    st.sidebar.header("🗂️ Datos de la simulación")
+    lineas_series = almacen.lineas()
+    linea_wip = st.sidebar.selectbox("Línea", lineas_series)
+
+    # Antes de validar la línea elegida: si le faltan datos, desde aquí se pueden cargar
+    with st.sidebar.expander("Agregar datos al almacén"):
+        nuevos_datos = st.file_uploader("CSV con columnas fecha, entradas y/o output_3_turnos", type=["csv"], key="series_csv")
+        linea_nueva = st.text_input("Línea destino", value=linea_wip or "")
+        if nuevos_datos is not None and st.button("Agregar al almacén"):
+            try:
+                df_nuevos = leer_csv_series(nuevos_datos)
+                if not linea_nueva.strip():
+                    raise ValueError("indica la línea destino")
+                almacen.agregar_tabla(linea_nueva.strip(), df_nuevos)
+                st.success(f"{len(df_nuevos)} filas agregadas a {linea_nueva.strip()}.")
+            except ValueError as e:
+                st.error(f"No se agregó el CSV: {e}")
+
+    rango_entradas = almacen.rango(linea_wip, "entradas") if linea_wip else None
+    if rango_entradas is None:
+        st.warning(f"La línea {linea_wip or '—'} no tiene serie de entradas en el almacén. Agrégala con un CSV desde la barra lateral.")
+        st.stop()
+    primera, ultima = rango_entradas
+    periodo = st.sidebar.date_input(
+        "Periodo a simular", value=(primera.date(), ultima.date()),
+        min_value=primera.date(), max_value=ultima.date()
+    )
+    desde, hasta = periodo if len(periodo) == 2 else (periodo[0], ultima.date())
+    with perf.seccion("series desde el almacén"):
+        serie_wip = almacen.consultar_tabla(linea_wip, list(VARIABLES_WIP), desde, hasta)
+    if serie_wip.empty:
+        st.warning("No hay datos de la línea en el periodo elegido.")
+        st.stop()
+    dias_fecha = serie_wip.index
+    entradas = serie_wip["entradas"].fillna(0).to_numpy()
+    # Output fijo para 3 turnos (NaN donde no hay plan: se usa la regla dinámica)
+    fixed_outputs_for_three_shifts = serie_wip["output_3_turnos"].to_numpy()
 
     st.sidebar.header("🔧 Parámetros de Simulación WIP")
     # --- cambio importante solicitado: el WIP inicial lo ingresa el usuario manualmente.
-    wip_inicial = st.sidebar.number_input("WIP inicial (WIP al comienzo del 01-dic) - ingresa el valor", min_value=0, value=1200, step=1)
-    st.sidebar.caption("Introduce el WIP que corresponde al inicio del 01-dic.")
+    inicio_txt = dias_fecha[0].strftime("%d-%b")
+    wip_inicial = st.sidebar.number_input("WIP inicial (WIP al comienzo del periodo) - ingresa el valor", min_value=0, value=1200, step=1)
+    st.sidebar.caption(f"Introduce el WIP que corresponde al inicio del {inicio_txt}.")
 
     turnos = st.sidebar.number_input("Turnos", min_value=1, max_value=4, value=3)
     cap_ar_por_turno = st.sidebar.number_input("Capacidad AR (cuello botella) por turno de 7h", min_value=1, value=290)
     lt_pct = st.sidebar.slider("Porcentaje de LT (%)", min_value=0.0, max_value=1.0, value=0.30, step=0.01)
     surf_capa_pct = st.sidebar.slider("Porcentaje de SURF+CAPA (%)", min_value=0.0, max_value=1.0, value=0.08, step=0.01)
 
-    cap_ar_dia = turnos * cap_ar_por_turno
-
-    # Output fijo para 3 turnos
-    fixed_outputs_for_three_shifts = np.array([
-        900, 900, 1150, 1150, 1150, 1150, 500, 1150, 1150, 1150, 1150, 1150, 1150, 500,
-        870, 840, 877, 798, 826, 784, 0, 800, 824, 785, 0, 631, 612, 587
-    ], dtype=float)
-
-    outputs_objetivo = []
-    wip_start = []   # WIP at start of each day
-    wip_end = []     # WIP at end of each day
-    salidas = []
-    salidas_calc = []
-    # Initialize start of day 1 with the user-provided wip_inicial
-    current_wip_start = float(wip_inicial)
-
-    for i in range(len(dias)):
-        entrada_today = float(entradas[i])
-        fecha_actual = dias_fecha[i]
-
-        # Decide output objetivo según la regla: fijos solo si turnos == 3
-        if turnos == 3:
-            output_obj = fixed_outputs_for_three_shifts[i]
+    es_domingo = dias_fecha.weekday == 6
+    wip_threshold = UMBRAL_WIP
+
+    modo_wip = st.radio(
+        "Modo de simulación:",
+        options=["Escenario único", "Barrido de parámetros (heatmap)", "Monte Carlo (estocástico)", "Horaria por estación",
+                 "Plan de turnos (mínimas horas-turno)", "Objetivo de estabilización (inverso)"],
+        horizontal=True
+    )
+
+    # Cada modo es un fragmento: sus propios widgets solo vuelven a ejecutar el bloque del modo;
+    # la barra lateral (datos y parámetros comunes) sí vuelve a ejecutar todo el tab.
+    @st.fragment
+    def modo_barrido():
+        # Etiqueta y rango por defecto de cada parámetro barrible
+        parametros_barrido = {
+            "wip_inicial": ("WIP inicial", 0.0, 5000.0),
+            "turnos": ("Turnos", 1.0, 4.0),
+            "cap_ar_por_turno": ("Capacidad AR por turno", 100.0, 500.0),
+            "lt_pct": ("Porcentaje de LT", 0.0, 1.0),
+            "surf_capa_pct": ("Porcentaje de SURF+CAPA", 0.0, 1.0),
+        }
+        nombres = list(parametros_barrido)
+        etiqueta = lambda nombre: parametros_barrido[nombre][0]
+
+        st.subheader("Barrido de parámetros: estabilización del WIP")
+        colx, coly = st.columns(2)
+        with colx:
+            param_x = st.selectbox("Parámetro eje X", nombres, index=nombres.index("wip_inicial"), format_func=etiqueta)
+            x_min = st.number_input("X mínimo", value=parametros_barrido[param_x][1], key=f"x_min_{param_x}")
+            x_max = st.number_input("X máximo", value=parametros_barrido[param_x][2], key=f"x_max_{param_x}")
+        with coly:
+            opciones_y = [n for n in nombres if n != param_x]
+            param_y = st.selectbox("Parámetro eje Y", opciones_y, index=opciones_y.index("cap_ar_por_turno") if "cap_ar_por_turno" in opciones_y else 0, format_func=etiqueta)
+            y_min = st.number_input("Y mínimo", value=parametros_barrido[param_y][1], key=f"y_min_{param_y}")
+            y_max = st.number_input("Y máximo", value=parametros_barrido[param_y][2], key=f"y_max_{param_y}")
+        puntos = st.slider("Puntos por eje", min_value=5, max_value=200, value=50, step=5)
+        metrica = st.selectbox("Métrica del heatmap", ["Días hasta estabilizar", "WIP máximo (fin de día)", "Días > 1000 WIP (fin de día)"])
+
+        def valores_eje(nombre, vmin, vmax):
+            # Turnos es entero: se barren los valores enteros del rango
+            if nombre == "turnos":
+                return np.arange(int(np.ceil(vmin)), int(np.floor(vmax)) + 1, dtype=float)
+            return np.linspace(vmin, vmax, puntos)
+
+        valores_x = valores_eje(param_x, x_min, x_max)
+        valores_y = valores_eje(param_y, y_min, y_max)
+        base = {
+            "wip_inicial": wip_inicial, "turnos": turnos, "cap_ar_por_turno": cap_ar_por_turno,
+            "lt_pct": lt_pct, "surf_capa_pct": surf_capa_pct,
+        }
+        with perf.seccion("simulación de la rejilla"):
+            barrido = barrido_cacheado(
+                base, param_x, valores_x, param_y, valores_y, entradas, es_domingo,
+                fixed_outputs_for_three_shifts, umbral=wip_threshold
+            )
+
+        estabiliza = barrido.dia_estabilizacion >= 0
+        fechas_est = np.where(
+            estabiliza,
+            np.asarray(dias_fecha.strftime("%d-%b"))[np.clip(barrido.dia_estabilizacion, 0, None)],
+            "Nunca"
+        )
+        if metrica == "Días hasta estabilizar":
+            z = np.where(estabiliza, barrido.dia_estabilizacion, np.nan)
+        elif metrica == "WIP máximo (fin de día)":
+            z = barrido.wip_max
         else:
-            # cálculo dinámico (igual que antes) para 1,2,4 turnos
-            if i in [0,1,2]:
-                output_obj = 600
-            elif fecha_actual.weekday() == 6:  # domingo
-                output_obj = 500
-            else:
-                output_obj = cap_ar_dia + (entrada_today * lt_pct) + (entrada_today * surf_capa_pct)
-
-        # Guardamos WIP de inicio del día
-        wip_start.append(current_wip_start)
-
-        # Disponibilidad para procesar en el día: según la lógica original se consideraba
-        # start_wip + entradas del día (es decir, las entradas del día llegan y pueden procesarse ese día).
-        available_to_process = current_wip_start + entrada_today
-
-        # Salida real (limitada por disponibilidad y output objetivo)
-        salida = min(available_to_process, output_obj)
-        salidas.append(salida)
-
-        # WIP al final del día (se usará como start del siguiente día)
-        end_wip = current_wip_start + entrada_today - salida
-        wip_end.append(end_wip)
-
-        # Preparar start para siguiente día (la fórmula que pediste):
-        # WIP_start_next_day = WIP_end_today (es decir WIP dia anterior + entradas dia anterior - salidas dia anterior)
-        current_wip_start = end_wip
-
-        outputs_objetivo.append(output_obj)
-        salidas_calc.append(salida)
-
-    # Construir DataFrame de salida
-    df_sim = pd.DataFrame({
-        "Fecha": dias_fecha,
-        "Entradas": entradas,
-        "WIP start (inicio día)": np.round(wip_start, 2),
-        "Output Objetivo": np.round(outputs_objetivo, 2),
-        "Salidas": np.round(salidas_calc, 2),
-        "WIP end (fin día)": np.round(wip_end, 2)
-    })
+            z = barrido.dias_arriba
+
+        fig_barrido = go.Figure(go.Heatmap(
+            x=valores_x, y=valores_y, z=z, colorscale="RdYlGn_r",
+            customdata=np.dstack([fechas_est, np.round(barrido.wip_max), barrido.dias_arriba]),
+            hovertemplate=(
+                f"{etiqueta(param_x)}: %{{x}}<br>{etiqueta(param_y)}: %{{y}}<br>"
+                "Estabilización: %{customdata[0]}<br>WIP máximo: %{customdata[1]}<br>"
+                "Días > 1000: %{customdata[2]}<extra></extra>"
+            ),
+            colorbar=dict(title=metrica)
+        ))
+        fig_barrido.update_layout(
+            title=f"{metrica} — {len(valores_x)}×{len(valores_y)} escenarios",
+            xaxis_title=etiqueta(param_x), yaxis_title=etiqueta(param_y), template="plotly_white"
+        )
+        with perf.seccion("figura heatmap") as s:
+            st.plotly_chart(s.payload(fig_barrido), use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        col1.metric("Escenarios que se estabilizan", f"{int(estabiliza.sum())} / {estabiliza.size}")
+        col2.metric("WIP máximo (peor escenario)", f"{np.max(barrido.wip_max):.0f}")
+        st.caption("Los parámetros no barridos toman el valor de la barra lateral. Las celdas en blanco nunca se estabilizan ≤ 1000.")
+
+    @st.fragment
+    def modo_montecarlo():
+        st.subheader("Monte Carlo: variabilidad de entradas y capacidad AR")
+        colm1, colm2, colm3 = st.columns(3)
+        with colm1:
+            n_replicas = st.select_slider("Réplicas", options=[1000, 5000, 10000, 25000, 50000, 100000], value=10000)
+            semilla = st.number_input("Semilla", min_value=0, value=0, step=1)
+        with colm2:
+            dist_entradas = st.selectbox("Distribución de entradas", DISTRIBUCIONES_ENTRADAS,
+                                         help="bootstrap: remuestrea entradas históricas del mismo día de la semana")
+            cv_entradas = st.slider("CV de entradas", min_value=0.0, max_value=1.0, value=0.20, step=0.01,
+                                    disabled=dist_entradas in ("poisson", "bootstrap"))
+        with colm3:
+            dist_capacidad = st.selectbox("Distribución de capacidad AR", DISTRIBUCIONES_CAPACIDAD, index=1)
+            cv_capacidad = st.slider("CV de capacidad AR", min_value=0.0, max_value=0.5, value=0.10, step=0.01,
+                                     disabled=dist_capacidad == "ninguna")
+
+        with perf.seccion("réplicas Monte Carlo"):
+            mc = montecarlo_cacheado(
+                entradas, dias_fecha.weekday.to_numpy(), fixed_outputs_for_three_shifts,
+                {"wip_inicial": wip_inicial, "turnos": turnos, "cap_ar_por_turno": cap_ar_por_turno,
+                 "lt_pct": lt_pct, "surf_capa_pct": surf_capa_pct},
+                (("n_replicas", n_replicas), ("dist_entradas", dist_entradas), ("cv_entradas", cv_entradas),
+                 ("dist_capacidad", dist_capacidad), ("cv_capacidad", cv_capacidad), ("semilla", int(semilla))),
+                umbral=wip_threshold
+            )
 
-    # --- ANÁLISIS DE ESTABILIDAD (usando WIP end) ---
-    wip_threshold = 1000
-    wip_np = np.array(wip_end)
-    stabilization_point = None
-    for i in range(len(wip_np)):
-        if wip_np[i] <= wip_threshold and np.all(wip_np[i:] <= wip_threshold):
-            stabilization_point = i
-            break
-
-    if stabilization_point is not None:
-        df_sim["Estabilizado"] = False
-        df_sim.loc[df_sim.index >= stabilization_point, "Estabilizado"] = True
-        estabilidad_fecha = df_sim.loc[stabilization_point, "Fecha"]
-        estabilidad_wip = df_sim.loc[stabilization_point, "WIP end (fin día)"]
-    else:
-        df_sim["Estabilizado"] = False
+        col1, col2, col3 = st.columns(3)
+        col1.metric("P(estabiliza ≤ 1000 al final)", f"{mc.prob_estable[-1]:.1%}")
+        col2.metric("WIP máximo P90", f"{np.percentile(mc.wip_max, 90):.0f}")
+        col3.metric("WIP fin de periodo P50 / P99", f"{mc.bandas_wip[50][-1]:.0f} / {mc.bandas_wip[99][-1]:.0f}")
+
+        v = ventana_grafico(dias_fecha, "ventana_mc")
+        x_mc = dias_fecha[v].to_numpy()
+        # Las tres bandas con los mismos índices LTTB (de su suma): fill="tonexty" une puntos de la misma fecha
+        bandas_mc = [mc.bandas_wip[p][v] for p in (99, 90, 50)]
+        fig_mc = go.Figure(lineas_alineadas(x_mc, bandas_mc, [
+            dict(name="P99", mode="lines", line=dict(width=0.5, color="#d62728")),
+            dict(name="P90", mode="lines", fill="tonexty", fillcolor="rgba(214,39,40,0.15)", line=dict(width=1, color="#ff7f0e")),
+            dict(name="P50", mode="lines", fill="tonexty", fillcolor="rgba(255,127,14,0.15)", line=dict(width=3, color="#1f77b4")),
+        ], referencia=np.sum(bandas_mc, axis=0)))
+        fig_mc.add_hline(y=wip_threshold, line_dash="dash", line_color="green", annotation_text="Umbral 1000")
+        fig_mc.update_layout(title=f"Bandas de WIP fin de día ({n_replicas} réplicas)", xaxis_title="Fecha", yaxis_title="WIP", template="plotly_white")
+        with perf.seccion("figura bandas") as s:
+            st.plotly_chart(s.payload(fig_mc), use_container_width=True)
+
+        fig_prob = go.Figure(linea(x_mc, mc.prob_estable[v], mode="lines+markers", line=dict(color="#2ca02c")))
+        fig_prob.update_layout(title="Probabilidad de haberse estabilizado ≤ 1000 a cada fecha", xaxis_title="Fecha", yaxis_title="Probabilidad", yaxis_tickformat=".0%", template="plotly_white")
+        st.plotly_chart(fig_prob, use_container_width=True)
+
+        df_mc = pd.DataFrame({
+            "Fecha": dias_fecha,
+            **{f"WIP P{p}": np.round(mc.bandas_wip[p], 2) for p in PERCENTILES},
+            "P(estabilizado)": np.round(mc.prob_estable, 4)
+        })
+        st.dataframe(df_mc, use_container_width=True)
+        st.download_button("Descargar bandas Monte Carlo (CSV)", data=df_mc.to_csv(index=False).encode("utf-8"), file_name="montecarlo_wip.csv", mime="text/csv")
+
+    @st.fragment
+    def modo_horario():
+        st.subheader("Simulación horaria: WIP por estación dentro del turno")
+        lineas_capacidad = {"SURF": ESTACIONES_SURF, "E&M": ESTACIONES_EM}
+        colh1, colh2, colh3 = st.columns(3)
+        with colh1:
+            linea_horaria = st.selectbox("Línea (capacidades por estación)", list(lineas_capacidad))
+            oee_horaria = st.slider("OEE de la línea", min_value=0.5, max_value=1.0, value=0.80, step=0.01, key="oee_horaria")
+        with colh2:
+            horas_turno_h = st.number_input("Horas por turno", min_value=4, max_value=12, value=7, key="horas_turno_horaria")
+            hora_inicio = st.number_input("Hora de inicio del primer turno", min_value=0, max_value=23, value=6)
+        with colh3:
+            turnos_domingo = st.number_input("Turnos los domingos", min_value=0, max_value=4, value=1)
+            scrap_horaria = st.slider("Tasa de scrap (%)", min_value=0.0, max_value=0.2, value=0.0, step=0.01, key="scrap_horaria")
+
+        modelo_h = construir_modelo({linea_horaria: lineas_capacidad[linea_horaria]})
+        cap_hora_est = calcular_capacidad(modelo_h, oee_horaria, turnos, horas_turno_h, scrap_horaria).cap_hora
+        horas_sim = pd.date_range(dias_fecha[0], dias_fecha[-1] + pd.Timedelta(hours=23), freq="h")
+        activo = calendario_turnos(horas_sim, turnos, horas_turno_h, hora_inicio, turnos_domingo)
+
+        # Entradas horarias reales si la línea las tiene; si no, las diarias repartidas en las horas de turno
+        entradas_h = almacen.consultar(linea_wip, "entradas_horarias", horas_sim[0], horas_sim[-1])
+        if len(entradas_h):
+            llegadas_h = entradas_h.reindex(horas_sim, fill_value=0).fillna(0).to_numpy()
+        else:
+            _, llegadas_h = expandir_diario(dias_fecha, entradas, activo, horas_sim)
+
+        with perf.seccion("simulación horaria"):
+            res_h = simular_horario(horas_sim, llegadas_h, cap_hora_est * (1 - scrap_horaria), activo, wip_inicial)
+            diario_h = resumen_diario(res_h, modelo_h.estaciones)
+
+        col1, col2, col3 = st.columns(3)
+        pico = diario_h["WIP pico horario"].idxmax()
+        col1.metric("WIP pico horario", f"{diario_h.loc[pico, 'WIP pico horario']:.0f}")
+        col2.metric("Día y hora del pico", f"{diario_h.loc[pico, 'Fecha']:%d-%b} {diario_h.loc[pico, 'Hora del pico']}")
+        col3.metric("Estación donde se acumula", diario_h.loc[pico, "Estación con más WIP en el pico"])
+
+        v = ventana_grafico(horas_sim, "ventana_horaria")
+        fig_h = figura_horaria(horas_sim[v].to_numpy(), res_h.wip[:, v], llegadas_h[v], modelo_h.estaciones, modelo_h.colores,
+                               f"WIP por estación al final de cada hora — {linea_horaria}")
+        with perf.seccion("figura horaria") as s:
+            st.plotly_chart(s.payload(fig_h), use_container_width=True)
+
+        st.markdown("### Resumen diario (resolución horaria)")
+        st.dataframe(diario_h.round({"WIP fin de día": 1, "Salidas": 1, "WIP pico horario": 1}), use_container_width=True)
+        st.download_button("Descargar simulación horaria (CSV)", data=diario_h.to_csv(index=False).encode("utf-8"), file_name="simulacion_wip_horaria.csv", mime="text/csv")
+
+    @st.fragment
+    def modo_escenario():
+        # Motor vectorizado (escenarios × días); aquí se evalúa un solo escenario
+        with perf.seccion("output objetivo"):
+            outputs_objetivo = output_objetivo(
+                entradas, es_domingo, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct,
+                fixed_outputs_for_three_shifts,
+            )
+        with perf.seccion("bucle de días"):
+            resultado = simular_wip(wip_inicial, entradas, outputs_objetivo, umbral=None)
+        with perf.seccion("búsqueda de estabilización"):
+            resultado = resultado._replace(dia_estabilizacion=dia_estabilizacion(resultado.wip_end, wip_threshold))
+
+        # Construir DataFrame de salida
+        df_sim = pd.DataFrame({
+            "Fecha": dias_fecha,
+            "Entradas": entradas,
+            "WIP start (inicio día)": np.round(resultado.wip_start[0], 2),
+            "Output Objetivo": np.round(outputs_objetivo[0], 2),
+            "Salidas": np.round(resultado.salidas[0], 2),
+            "WIP end (fin día)": np.round(resultado.wip_end[0], 2)
+        })
 
-    dias_arriba = int(np.sum(wip_np > wip_threshold))
-    dias_transicion = stabilization_point if stabilization_point is not None else len(wip_np)
-    wip_promedio_pre = np.mean(wip_np[:dias_transicion]) if dias_transicion > 0 else 0
+        # --- ANÁLISIS DE ESTABILIDAD (usando WIP end) ---
+        wip_np = resultado.wip_end[0]
+        stabilization_point = int(resultado.dia_estabilizacion[0])
+        if stabilization_point < 0:
+            stabilization_point = None
+
+        if stabilization_point is not None:
+            df_sim["Estabilizado"] = False
+            df_sim.loc[df_sim.index >= stabilization_point, "Estabilizado"] = True
+            estabilidad_fecha = df_sim.loc[stabilization_point, "Fecha"]
+            estabilidad_wip = df_sim.loc[stabilization_point, "WIP end (fin día)"]
+        else:
+            df_sim["Estabilizado"] = False
 
-    st.markdown("## KPIs")
-    col1, col2 = st.columns(2)
-    col1.metric("WIP máximo (fin de día)", f"{np.max(wip_np):.0f}")
-    col2.metric("Días > 1000 WIP (fin de día)", f"{dias_arriba}")
+        dias_arriba = int(np.sum(wip_np > wip_threshold))
+        dias_transicion = stabilization_point if stabilization_point is not None else len(wip_np)
+        wip_promedio_pre = np.mean(wip_np[:dias_transicion]) if dias_transicion > 0 else 0
 
-    if stabilization_point is not None:
-        st.success(f"WIP se estabiliza ≤ 1000 el {estabilidad_fecha.strftime('%d-%b')} con {int(estabilidad_wip)} jobs (fin de día), después de {dias_transicion} días.")
-    else:
-        st.warning("El WIP nunca se estabiliza por debajo de 1000 en el periodo simulado (fin de día).")
-
-    st.markdown(f"- WIP promedio (fin de día) antes de estabilizarse: **{wip_promedio_pre:.0f}**")
-
-    st.subheader("Evolución diaria de Entradas, Salidas y WIP (Simulación)")
-
-    fig = go.Figure()
-    fig.add_trace(go.Bar(x=df_sim["Fecha"], y=df_sim["Entradas"], name="Entradas", marker=dict(color="#2ca02c"), opacity=0.5))
-    # Usamos 'Salidas' calculadas
-    fig.add_trace(go.Bar(x=df_sim["Fecha"], y=df_sim["Salidas"], name="Salidas", marker=dict(color="#d62728"), opacity=0.5))
-    # Mostramos WIP end (fin de día) como línea
-    fig.add_trace(go.Scatter(x=df_sim["Fecha"], y=df_sim["WIP end (fin día)"], name="WIP (fin día)", mode="lines+markers", line=dict(width=3, color="#1f77b4")))
-
-    # Bandas y output objetivo
-    fig.add_shape(type="rect", xref="x", yref="y",
-                  x0=df_sim["Fecha"].iloc[0], y0=wip_threshold, x1=df_sim["Fecha"].iloc[-1], y1=max(wip_np),
-                  fillcolor="red", opacity=0.08, layer="below", line_width=0)
-    fig.add_shape(type="rect", xref="x", yref="y",
-                  x0=df_sim["Fecha"].iloc[0], y0=0, x1=df_sim["Fecha"].iloc[-1], y1=wip_threshold,
-                  fillcolor="green", opacity=0.08, layer="below", line_width=0)
-    fig.add_trace(go.Scatter(x=df_sim["Fecha"], y=df_sim["Output Objetivo"], name="Output Objetivo diario", mode="lines", line=dict(dash="dash", color="#555")))
-
-    if stabilization_point is not None:
-        fig.add_trace(go.Scatter(
-            x=[estabilidad_fecha],
-            y=[estabilidad_wip],
-            mode="markers+text",
-            marker=dict(size=14, color="orange"),
-            text=["Estabilización"],
-            textposition="top center",
-            name="Estabilización WIP",
-        ))
+        st.markdown("## KPIs")
+        col1, col2 = st.columns(2)
+        col1.metric("WIP máximo (fin de día)", f"{np.max(wip_np):.0f}")
+        col2.metric("Días > 1000 WIP (fin de día)", f"{dias_arriba}")
 
-    fig.update_layout(barmode='overlay', xaxis_title="Fecha", yaxis_title="Cantidad", legend_title="Variable", template="plotly_white")
-    fig.update_yaxes(range=[0, max(max(wip_np)*1.1, 1500)])
-    st.plotly_chart(fig, use_container_width=True)
+        if stabilization_point is not None:
+            st.success(f"WIP se estabiliza ≤ 1000 el {estabilidad_fecha.strftime('%d-%b')} con {int(estabilidad_wip)} jobs (fin de día), después de {dias_transicion} días.")
+        else:
+            st.warning("El WIP nunca se estabiliza por debajo de 1000 en el periodo simulado (fin de día).")
+
+        st.markdown(f"- WIP promedio (fin de día) antes de estabilizarse: **{wip_promedio_pre:.0f}**")
+
+        st.subheader("Evolución diaria de Entradas, Salidas y WIP (Simulación)")
+
+        # Horizontes largos: ventana de fechas + LTTB/WebGL por traza (graficos.py)
+        d = df_sim.iloc[ventana_grafico(dias_fecha, "ventana_wip")]
+        x_sim = d["Fecha"].to_numpy()
+        fig = go.Figure()
+        fig.add_trace(barras(x_sim, d["Entradas"].to_numpy(), name="Entradas", marker=dict(color="#2ca02c"), opacity=0.5))
+        # Usamos 'Salidas' calculadas
+        fig.add_trace(barras(x_sim, d["Salidas"].to_numpy(), name="Salidas", marker=dict(color="#d62728"), opacity=0.5))
+        # Mostramos WIP end (fin de día) como línea
+        fig.add_trace(linea(x_sim, d["WIP end (fin día)"].to_numpy(), name="WIP (fin día)", mode="lines+markers", line=dict(width=3, color="#1f77b4")))
+
+        # Bandas y output objetivo
+        fig.add_shape(type="rect", xref="x", yref="y",
+                      x0=d["Fecha"].iloc[0], y0=wip_threshold, x1=d["Fecha"].iloc[-1], y1=max(wip_np),
+                      fillcolor="red", opacity=0.08, layer="below", line_width=0)
+        fig.add_shape(type="rect", xref="x", yref="y",
+                      x0=d["Fecha"].iloc[0], y0=0, x1=d["Fecha"].iloc[-1], y1=wip_threshold,
+                      fillcolor="green", opacity=0.08, layer="below", line_width=0)
+        fig.add_trace(linea(x_sim, d["Output Objetivo"].to_numpy(), name="Output Objetivo diario", mode="lines", line=dict(dash="dash", color="#555")))
+
+        if stabilization_point is not None:
+            fig.add_trace(go.Scatter(
+                x=[estabilidad_fecha],
+                y=[estabilidad_wip],
+                mode="markers+text",
+                marker=dict(size=14, color="orange"),
+                text=["Estabilización"],
+                textposition="top center",
+                name="Estabilización WIP",
+            ))
+
+        fig.update_layout(barmode='overlay', xaxis_title="Fecha", yaxis_title="Cantidad", legend_title="Variable", template="plotly_white")
+        fig.update_yaxes(range=[0, max(max(wip_np)*1.1, 1500)])
+        with perf.seccion("figura WIP") as s:
+            st.plotly_chart(s.payload(fig), use_container_width=True)
+
+        st.markdown("### Tabla de Simulación (detalle diario)")
+        with perf.seccion("tabla y CSV de descarga") as s:
+            st.dataframe(s.payload(df_sim), use_container_width=True)
+            csv_sim = s.payload(df_sim.to_csv(index=False).encode("utf-8"))
+        st.download_button("Descargar simulación (CSV)", data=csv_sim, file_name="simulacion_wip_variable.csv", mime="text/csv")
+
+    @st.fragment
+    def modo_plan_turnos():
+        st.subheader("Plan de turnos por día: mínimas horas-turno con WIP ≤ 1000")
+        colp1, colp2, colp3 = st.columns(3)
+        with colp1:
+            opciones_plan = st.multiselect("Turnos permitidos por día", OPCIONES_TURNOS, default=list(OPCIONES_TURNOS))
+        with colp2:
+            horas_por_turno = st.number_input("Horas por turno", min_value=4, max_value=12, value=7, key="horas_turno_plan")
+        with colp3:
+            resolucion = st.number_input("Resolución del WIP (lentes por cubeta)", min_value=1.0, max_value=100.0, value=5.0, step=1.0,
+                                         help="Más fina = plan más cercano al óptimo, más lento")
+        if not opciones_plan:
+            st.warning("Elige al menos una opción de turnos.")
+            return
+
+        with perf.seccion("programación dinámica"):
+            plan = planificar_turnos(
+                entradas, es_domingo, fixed_outputs_for_three_shifts, wip_inicial, cap_ar_por_turno, lt_pct, surf_capa_pct,
+                umbral=wip_threshold, opciones=opciones_plan, horas_por_turno=horas_por_turno, resolucion=resolucion
+            )
+        # Referencia: los turnos fijos de la barra lateral todos los días
+        uniforme = simular_wip(wip_inicial, entradas, output_objetivo(
+            entradas, es_domingo, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct, fixed_outputs_for_three_shifts
+        ), umbral=None).wip_end[0]
+        horas_uniforme = turnos * horas_por_turno * len(entradas)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Horas-turno del plan", f"{plan.horas_turno:.0f}", delta=f"{plan.horas_turno - horas_uniforme:.0f} vs. {turnos} turnos fijos", delta_color="inverse")
+        col2.metric("Días > 1000 WIP (plan)", f"{plan.dias_sobre_umbral}", delta=f"{plan.dias_sobre_umbral - int((uniforme > wip_threshold).sum())} vs. turnos fijos", delta_color="inverse")
+        col3.metric("WIP máximo (plan)", f"{plan.wip_end.max():.0f}")
+        if plan.dias_sobre_umbral:
+            st.caption("No hay plan que mantenga el WIP ≤ 1000 todos los días con estas opciones; el plan minimiza primero esos días y después las horas-turno.")
+
+        fig_plan = go.Figure()
+        fig_plan.add_trace(barras(dias_fecha.to_numpy(), plan.turnos, name="Turnos (plan)", marker=dict(color="#9467bd"), opacity=0.4, yaxis="y2"))
+        fig_plan.add_trace(linea(dias_fecha.to_numpy(), plan.wip_end, name="WIP fin de día (plan)", mode="lines+markers", line=dict(width=3, color="#1f77b4")))
+        fig_plan.add_trace(linea(dias_fecha.to_numpy(), uniforme, name=f"WIP fin de día ({turnos} turnos fijos)", mode="lines", line=dict(dash="dot", color="#7f7f7f")))
+        fig_plan.add_hline(y=wip_threshold, line_dash="dash", line_color="green", annotation_text="Umbral 1000")
+        fig_plan.update_layout(
+            title="Turnos por día y WIP resultante", xaxis_title="Fecha", yaxis_title="WIP",
+            yaxis2=dict(title="Turnos", overlaying="y", side="right", range=[0, max(OPCIONES_TURNOS) + 1], dtick=1),
+            template="plotly_white"
+        )
+        st.plotly_chart(fig_plan, use_container_width=True)
+
+        df_plan = pd.DataFrame({
+            "Fecha": dias_fecha,
+            "Entradas": entradas,
+            "Turnos": plan.turnos,
+            "Output Objetivo": np.round(plan.output, 2),
+            "WIP end (fin día)": np.round(plan.wip_end, 2),
+        })
+        st.dataframe(df_plan, use_container_width=True)
+        st.download_button("Descargar plan de turnos (CSV)", data=df_plan.to_csv(index=False).encode("utf-8"), file_name="plan_turnos.csv", mime="text/csv")
+
+    @st.fragment
+    def modo_inverso():
+        st.subheader("Objetivo de estabilización: capacidad mínima o WIP inicial máximo")
+        coli1, coli2 = st.columns(2)
+        with coli1:
+            pregunta = st.radio("Calcular", ["Capacidad AR mínima por turno", "WIP inicial máximo"], horizontal=True)
+        with coli2:
+            fecha_objetivo = st.date_input(
+                "Estabilizado (WIP ≤ 1000 desde) a más tardar el", value=dias_fecha[len(dias_fecha) // 2].date(),
+                min_value=dias_fecha[0].date(), max_value=dias_fecha[-1].date()
+            )
+        dia_objetivo = int(dias_fecha.searchsorted(pd.Timestamp(fecha_objetivo)))
 
-    st.markdown("### Tabla de Simulación (detalle diario)")
-    st.dataframe(df_sim, use_container_width=True)
-    st.download_button("Descargar simulación (CSV)", data=df_sim.to_csv(index=False).encode("utf-8"), file_name="simulacion_wip_variable.csv", mime="text/csv")
+        with perf.seccion("búsqueda inversa"):
+            if pregunta == "Capacidad AR mínima por turno":
+                res_inv = capacidad_minima(entradas, es_domingo, fixed_outputs_for_three_shifts, wip_inicial, turnos, lt_pct,
+                                           surf_capa_pct, dia_objetivo, umbral=wip_threshold)
+                actual, unidad = cap_ar_por_turno, "lentes/turno"
+            else:
+                res_inv = wip_inicial_maximo(entradas, es_domingo, fixed_outputs_for_three_shifts, turnos, cap_ar_por_turno, lt_pct,
+                                             surf_capa_pct, dia_objetivo, umbral=wip_threshold)
+                actual, unidad = wip_inicial, "lentes"
+        # Referencia: el escenario de la barra lateral
+        referencia = simular_wip(wip_inicial, entradas, output_objetivo(
+            entradas, es_domingo, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct, fixed_outputs_for_three_shifts
+        ), umbral=None).wip_end[0]
+
+        if res_inv.valor is None:
+            if pregunta == "Capacidad AR mínima por turno":
+                st.warning("Ninguna capacidad AR logra estabilizar para esa fecha: los días de arranque, los domingos y los días "
+                           "con output fijo de 3 turnos no dependen de la capacidad AR. Prueba otra fecha, otros turnos o menos WIP inicial.")
+            else:
+                st.warning("Ni con WIP inicial 0 se estabiliza para esa fecha con estos parámetros.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric(pregunta, f"{res_inv.valor:,} {unidad}", delta=f"{res_inv.valor - actual:,} vs. barra lateral",
+                        delta_color="inverse" if pregunta == "Capacidad AR mínima por turno" else "normal")
+            dia_inv = int(res_inv.trayectoria.dia_estabilizacion[0])
+            col2.metric("Se estabiliza el", dias_fecha[dia_inv].strftime("%d-%b"))
+            col3.metric("WIP máximo (fin de día)", f"{res_inv.trayectoria.wip_end.max():.0f}")
+            if pregunta == "Capacidad AR mínima por turno" and turnos == 3 and not np.isnan(fixed_outputs_for_three_shifts).any():
+                st.caption("Con 3 turnos todos los días usan el output fijo: la capacidad AR no cambia el resultado.")
+        st.caption(f"{res_inv.evaluaciones} escenarios simulados en la búsqueda.")
+
+        fig_inv = go.Figure()
+        nombre_inv = "WIP fin de día (solución)" if res_inv.valor is not None else "WIP fin de día (extremo probado)"
+        fig_inv.add_trace(linea(dias_fecha.to_numpy(), res_inv.trayectoria.wip_end[0], name=nombre_inv, mode="lines+markers",
+                                line=dict(width=3, color="#1f77b4")))
+        fig_inv.add_trace(linea(dias_fecha.to_numpy(), referencia, name="WIP fin de día (barra lateral)", mode="lines", line=dict(dash="dot", color="#7f7f7f")))
+        fig_inv.add_hline(y=wip_threshold, line_dash="dash", line_color="green", annotation_text="Umbral 1000")
+        fig_inv.add_vline(x=dias_fecha[dia_objetivo], line_dash="dot", line_color="red")
+        fig_inv.update_layout(title="WIP con el valor encontrado", xaxis_title="Fecha", yaxis_title="WIP", template="plotly_white")
+        st.plotly_chart(fig_inv, use_container_width=True)
+
+    modos = {
+        "Barrido de parámetros (heatmap)": modo_barrido,
+        "Monte Carlo (estocástico)": modo_montecarlo,
+        "Horaria por estación": modo_horario,
+        "Escenario único": modo_escenario,
+        "Plan de turnos (mínimas horas-turno)": modo_plan_turnos,
+        "Objetivo de estabilización (inverso)": modo_inverso,
+    }
+    with perf.seccion(modo_wip):
+        modos[modo_wip]()
 
     with st.expander("¿Cómo se calcula el output objetivo y el análisis de estabilidad?"):
         st.markdown(f"""
@@ -458,5 +956,71 @@ elif tab == "Simulación WIP":
             - Salidas = min(WIP_start + Entradas_del_día, Output Objetivo del día)
             - WIP_end = WIP_start + Entradas_del_día - Salidas
         - **Estabilidad:** el primer día (fin de día) donde WIP ≤ 1000 y nunca vuelve a superar 1000.
+        - **Objetivo de estabilización:** la capacidad AR mínima por turno (o el WIP inicial máximo) con WIP ≤ 1000 desde la fecha elegida hasta el final; como el WIP solo baja con más capacidad y solo sube con más WIP inicial, se busca por intervalos simulando decenas de candidatos por paso en una sola llamada.
+        - **Plan de turnos:** programación dinámica sobre (día, WIP en cubetas): cada día prueba los turnos permitidos con la misma regla de output y elige el plan con menos días > 1000 y, entre esos, menos horas-turno.
+        - **Horaria por estación:** cada hora cada estación procesa min(WIP + llegadas, ∑ máquinas × capacidad × OEE) solo en horas de turno; lo procesado pasa a la siguiente estación. Muestra en qué estación y a qué hora se forma el pico diario.
+        - **Monte Carlo:** perturba entradas y la capacidad AR (solo en días con regla dinámica; los días de arranque, domingos y con output fijo de 3 turnos quedan como están) en cada réplica (las réplicas se reparten en un pool de procesos con semillas fijas por lote) y reporta bandas P50/P90/P99 y la probabilidad de estabilizarse por fecha.
+        - **Barrido de parámetros:** simula toda la rejilla de dos parámetros en una sola llamada; cada celda muestra la fecha de estabilización, el WIP máximo y los días > 1000.
         
         """)
+
+# ========== BLOQUE Plantas ==========
+elif tab == "Plantas (rollup)":
+    st.title("🏭 Capacidad por planta y línea")
+    st.caption(f"Una configuración JSON por línea en {DIRECTORIO_PLANTAS}/<planta>/ (ruta en CAPACIDAD_PLANTAS_DIR). "
+               "Cada corrida relee solo los archivos modificados.")
+    st.button("🔄 Releer configuraciones")
+
+    with perf.seccion("configuraciones de planta"):
+        resumen = evaluar_plantas()
+    for ruta_config, error in resumen.errores.items():
+        st.warning(f"{ruta_config}: {error}")
+
+    if resumen.lineas.empty:
+        st.info("No hay configuraciones de línea válidas en el directorio.")
+    else:
+        st.caption(f"{len(resumen.recalculadas)} de {len(resumen.lineas)} líneas recalculadas en esta corrida.")
+        cols = st.columns(min(len(resumen.plantas), 4))
+        for k, fila in resumen.plantas.iterrows():
+            with cols[k % len(cols)]:
+                st.metric(f"🏭 {fila['Planta']}", f"{fila['Capacidad planta (lentes/día)']:,.0f} lentes/día")
+                st.caption(f"Restricción: {fila['Línea restrictiva']} · cuello {fila['Cuello de botella']}")
+
+        with perf.seccion("figura de plantas") as s:
+            lineas_cfg = resumen.lineas
+            fig_plantas = go.Figure([
+                go.Bar(x=g["Planta"], y=g["Capacidad equivalente planta"], name=nombre,
+                       text=g["Cuello de botella"], textposition="inside")
+                for nombre, g in lineas_cfg.groupby("Línea", sort=True)
+            ])
+            fig_plantas.add_trace(go.Scatter(
+                x=resumen.plantas["Planta"], y=resumen.plantas["Capacidad planta (lentes/día)"], mode="markers",
+                name="Capacidad planta", marker=dict(symbol="line-ew-open", size=40, line=dict(width=3, color="#c0392b"))
+            ))
+            fig_plantas.update_layout(title="Capacidad equivalente por línea (lentes/día de la planta)", barmode="group",
+                                      yaxis_title="Lentes/día", template="plotly_white")
+            s.payload(fig_plantas)
+        st.plotly_chart(fig_plantas, use_container_width=True)
+
+        st.markdown("### Líneas")
+        st.dataframe(lineas_cfg.round(3), hide_index=True, use_container_width=True)
+
+        st.markdown("### Cuellos de botella de cada planta")
+        n_cuellos = st.slider("Estaciones más restrictivas por planta", min_value=1, max_value=20, value=5)
+        cuellos_planta = (resumen.estaciones.sort_values(["Planta", "Capacidad equivalente planta"], kind="stable")
+                          .groupby("Planta", sort=True).head(n_cuellos))
+        st.dataframe(cuellos_planta.round(2), hide_index=True, use_container_width=True)
+
+        with perf.seccion("CSV de descarga") as s:
+            csv_plantas = s.payload(lineas_cfg.to_csv(index=False).encode("utf-8"))
+        st.download_button("Descargar resumen de líneas en CSV", data=csv_plantas, file_name="capacidad_plantas.csv", mime="text/csv")
+
+    with st.expander("¿Cómo se calcula el rollup?"):
+        st.markdown("""
+        - **Capacidad de línea:** la misma que en los tabs SURF y E&M (estación con menor capacidad diaria), con el OEE, turnos, horas y scrap de cada archivo.
+        - **Capacidad equivalente:** capacidad de la línea ÷ fracción de los trabajos de la planta que pasa por ella.
+        - **Capacidad de la planta:** la menor capacidad equivalente entre sus líneas; esa línea es la restricción de la planta.
+        - **Recarga:** cada archivo se recalcula solo si cambió su contenido; los nuevos o modificados se leen en paralelo y se evalúan juntos en una sola llamada del motor de capacidad.
+        """)
+
+panel_perfilado(perf)
@@ -0,0 +1,251 @@
+"""Benchmarks reproducibles de los caminos calientes del dashboard.
+
+    python benchmarks/suite.py --salida benchmarks/resultados.json
+    python benchmarks/suite.py --rapido --comparar benchmarks/base.json
+
+Cubre el motor de capacidad (SURF/E&M), la simulación WIP diaria y la
+búsqueda de estabilización, la simulación horaria por estación, la
+ingesta de archivos (lectura en frío y desde la caché Parquet) y la
+construcción/serialización de figuras Plotly. Cada caso se parametriza por
+número de estaciones, horizonte (28 días hasta varios años horarios) y
+número de escenarios; los datos son sintéticos con semilla fija.
+
+Por caso se guarda el tiempo mínimo y la mediana de varias repeticiones y,
+en una ejecución aparte con tracemalloc (que frena el código), el pico de
+memoria de Python/numpy. `--comparar` marca como regresión los casos cuyo
+tiempo mínimo o pico de memoria superan la base en más de `--tolerancia`.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from capacidad import calcular_capacidad, construir_modelo  # noqa: E402
+from ingesta import leer_tabla  # noqa: E402
+from lineas import ESTACIONES_EM, ESTACIONES_SURF  # noqa: E402
+from simulacion_horaria import calendario_turnos, expandir_diario, simular_horario  # noqa: E402
+from simulacion_wip import dia_estabilizacion, simular_escenarios  # noqa: E402
+
+SEMILLA = 12345
+
+# (estaciones, escenarios), (días, escenarios), ... por benchmark; --rapido usa solo la primera fila
+CASOS = {
+    "capacidad": [(7, 1), (7, 10_000), (50, 1_000), (200, 1_000)],
+    "wip_diario": [(28, 1), (28, 10_000), (365, 10_000), (3 * 365, 1_000)],
+    "estabilizacion": [(28, 10_000), (365, 10_000), (3 * 365, 10_000)],
+    "wip_horario": [(7, 28), (7, 365), (50, 365), (7, 3 * 365)],
+    "ingesta": [(10_000,), (200_000,), (1_000_000,)],
+    "figuras": [(28, 7), (365 * 24, 7), (3 * 365 * 24, 7), (365 * 24, 50)],
+}
+
+
+def _estaciones(n):
+    # Línea sintética de n estaciones repitiendo las de SURF y E&M con nombres únicos
+    base = ESTACIONES_SURF + ESTACIONES_EM
+    return [{**base[k % len(base)], "name": f"{base[k % len(base)]['name']} {k}"} for k in range(n)]
+
+
+def _entradas(dias, rng):
+    return rng.normal(800, 250, dias).clip(0)
+
+
+def _medir(funcion, repeticiones):
+    """(tiempos, pico_bytes, resultado) de llamar `funcion()` sin argumentos."""
+    funcion()  # calentamiento: imports diferidos, cachés de numpy/pandas
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return tiempos, pico, resultado
+
+
+def bench_capacidad(n_estaciones, n_escenarios):
+    modelo = construir_modelo({"linea": _estaciones(n_estaciones)})
+    rng = np.random.default_rng(SEMILLA)
+    cantidad = modelo.cantidad + rng.integers(0, 3, (n_escenarios, modelo.cantidad.size))
+    return (lambda: calcular_capacidad(modelo, 0.8, 3, 7, 0.02, cantidad=cantidad)), {}
+
+
+def bench_wip_diario(dias, n_escenarios):
+    rng = np.random.default_rng(SEMILLA)
+    fechas = pd.date_range("2025-01-01", periods=dias, freq="D")
+    entradas = _entradas(dias, rng)
+    fijos = np.full(dias, np.nan)
+    wip_inicial = rng.uniform(0, 5000, n_escenarios)
+    cap = rng.uniform(200, 400, n_escenarios)
+    return (lambda: simular_escenarios(entradas, fechas.weekday == 6, fijos, wip_inicial, 3, cap, 0.3, 0.08)), {}
+
+
+def bench_estabilizacion(dias, n_escenarios):
+    rng = np.random.default_rng(SEMILLA)
+    wip_end = np.abs(rng.normal(900, 300, (n_escenarios, dias)))
+    return (lambda: dia_estabilizacion(wip_end)), {}
+
+
+def bench_wip_horario(n_estaciones, dias):
+    rng = np.random.default_rng(SEMILLA)
+    modelo = construir_modelo({"linea": _estaciones(n_estaciones)})
+    cap_hora = calcular_capacidad(modelo, 0.8, 3, 7).cap_hora
+    fechas = pd.date_range("2025-01-01", periods=dias, freq="D")
+    horas = pd.date_range(fechas[0], fechas[-1] + pd.Timedelta(hours=23), freq="h")
+    activo = calendario_turnos(horas, 3, 7, turnos_domingo=1)
+    _, llegadas = expandir_diario(fechas, _entradas(dias, rng), activo, horas)
+    return (lambda: simular_horario(horas, llegadas, cap_hora, activo, 1200)), {"horas": len(horas)}
+
+
+def bench_ingesta(filas):
+    rng = np.random.default_rng(SEMILLA)
+    df = pd.DataFrame({
+        "fecha": pd.date_range("2025-01-01", periods=filas, freq="min").astype(str),
+        "maquina": rng.choice(["Generador", "Pulidora", "Encintado", "Manual"], filas),
+        "lentes": rng.integers(1, 3, filas),
+    })
+    datos = df.to_csv(index=False).encode("utf-8")
+    directorio = Path(tempfile.mkdtemp(prefix="bench_ingesta_"))
+    atexit.register(shutil.rmtree, directorio, ignore_errors=True)
+
+    def leer_en_frio():
+        for p in directorio.glob("*.parquet"):
+            p.unlink()
+        return leer_tabla(datos, "log.csv", directorio=directorio)
+
+    return leer_en_frio, {"bytes_archivo": len(datos), "leer_cacheado": lambda: leer_tabla(datos, "log.csv", directorio=directorio)}
+
+
+def bench_figuras(horas, n_estaciones):
+    import plotly.graph_objs as go
+
+    rng = np.random.default_rng(SEMILLA)
+    x = pd.date_range("2025-01-01", periods=horas, freq="h").to_numpy()
+    wip = np.abs(rng.normal(100, 40, (n_estaciones, horas)))
+
+    def construir():
+        fig = go.Figure()
+        for k in range(n_estaciones):
+            fig.add_trace(go.Scatter(x=x, y=wip[k], name=f"Estación {k}", mode="lines", stackgroup="wip"))
+        fig.update_layout(template="plotly_white")
+        return fig
+
+    return construir, {"serializar": lambda: construir().to_json()}
+
+
+BENCHMARKS = {
+    "capacidad": (bench_capacidad, ("estaciones", "escenarios")),
+    "wip_diario": (bench_wip_diario, ("dias", "escenarios")),
+    "estabilizacion": (bench_estabilizacion, ("dias", "escenarios")),
+    "wip_horario": (bench_wip_horario, ("estaciones", "dias")),
+    "ingesta": (bench_ingesta, ("filas",)),
+    "figuras": (bench_figuras, ("horas", "estaciones")),
+}
+
+
+def _registro(nombre, parametros, tiempos, pico, **extra):
+    return {
+        "benchmark": nombre,
+        "parametros": parametros,
+        "repeticiones": len(tiempos),
+        "tiempo_min_s": min(tiempos),
+        "tiempo_mediana_s": statistics.median(tiempos),
+        "memoria_pico_bytes": pico,
+        **extra,
+    }
+
+
+def ejecutar(seleccion, repeticiones, rapido):
+    resultados = []
+    for nombre in seleccion:
+        preparar, claves = BENCHMARKS[nombre]
+        for caso in CASOS[nombre][:1] if rapido else CASOS[nombre]:
+            parametros = dict(zip(claves, caso))
+            funcion, extra = preparar(*caso)
+            tiempos, pico, resultado = _medir(funcion, repeticiones)
+            # Variantes del mismo caso (lectura cacheada, serialización) como registros propios
+            variantes = {k: v for k, v in extra.items() if callable(v)}
+            datos = {k: v for k, v in extra.items() if not callable(v)}
+            if nombre == "figuras":
+                datos["bytes_json"] = len(resultado.to_json())
+            resultados.append(_registro(nombre, parametros, tiempos, pico, **datos))
+            for variante, f in variantes.items():
+                t, p, _ = _medir(f, repeticiones)
+                resultados.append(_registro(f"{nombre}.{variante}", parametros, t, p, **datos))
+            print(f"{nombre:<16} {parametros}  min {min(tiempos) * 1e3:9.2f} ms  pico {pico / 2 ** 20:8.1f} MiB", file=sys.stderr)
+    return resultados
+
+
+def _metadatos():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def comparar(resultados, base, tolerancia):
+    """Casos (benchmark, parámetros) más lentos o con más memoria que `base` en más de `tolerancia`."""
+    previos = {(r["benchmark"], json.dumps(r["parametros"], sort_keys=True)): r for r in base["resultados"]}
+    regresiones = []
+    for r in resultados:
+        b = previos.get((r["benchmark"], json.dumps(r["parametros"], sort_keys=True)))
+        if b is None:
+            continue
+        for metrica in ("tiempo_min_s", "memoria_pico_bytes"):
+            if b[metrica] > 0 and r[metrica] > b[metrica] * (1 + tolerancia):
+                regresiones.append({"benchmark": r["benchmark"], "parametros": r["parametros"], "metrica": metrica,
+                                    "base": b[metrica], "actual": r[metrica], "razon": r[metrica] / b[metrica]})
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de capacidad, WIP, ingesta y figuras.")
+    parser.add_argument("--salida", type=Path, default=Path("benchmarks") / "resultados.json")
+    parser.add_argument("--solo", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--rapido", action="store_true", help="solo el caso más chico de cada benchmark")
+    parser.add_argument("--comparar", type=Path, help="resultados JSON de referencia")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento relativo permitido (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    resultados = ejecutar(args.solo, args.repeticiones, args.rapido)
+    informe = {"metadatos": _metadatos(), "resultados": resultados}
+    if args.comparar:
+        informe["regresiones"] = comparar(resultados, json.loads(args.comparar.read_text(encoding="utf-8")), args.tolerancia)
+        for r in informe["regresiones"]:
+            print(f"REGRESIÓN {r['benchmark']} {r['parametros']} {r['metrica']}: ×{r['razon']:.2f}", file=sys.stderr)
+    args.salida.parent.mkdir(parents=True, exist_ok=True)
+    args.salida.write_text(json.dumps(informe, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 1 if informe.get("regresiones") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Motor de capacidad por estación y cuello de botella, sin Streamlit.
+
+Las líneas (SURF, E&M, ...) se aplanan en arreglos: una fila por tipo de
+máquina con su estación, cantidad y capacidad. Una sola pasada vectorizada
+calcula la capacidad hora/día de todas las estaciones y el cuello de botella
+de cada línea, también para lotes de configuraciones (cantidades o
+capacidades con forma (configuraciones, máquinas)).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ModeloCapacidad(NamedTuple):
+    lineas: list                # nombre de cada línea
+    estaciones: list            # nombre de cada estación (todas las líneas, en orden)
+    iconos: list
+    colores: list
+    tipos: list                 # tipo de cada máquina
+    linea_estacion: np.ndarray  # (estaciones,) índice de línea
+    inicio_linea: np.ndarray    # (líneas,) primera estación de cada línea
+    estacion_maquina: np.ndarray  # (máquinas,) índice global de estación
+    cantidad: np.ndarray        # (máquinas,)
+    capacidad: np.ndarray       # (máquinas,) lentes/hora por máquina
+
+
+class ResultadoCapacidad(NamedTuple):
+    cap_hora: np.ndarray        # (..., estaciones) ∑ cantidad × capacidad × OEE
+    cap_diaria: np.ndarray      # (..., estaciones) cap_hora × turnos × horas × (1 - scrap)
+    cap_linea: np.ndarray       # (..., líneas) capacidad diaria del cuello de botella
+    cuello: np.ndarray          # (..., líneas) índice global de la estación cuello de botella
+
+
+def construir_modelo(lineas):
+    """Aplana `{nombre_linea: estaciones}` (estructura de `lineas.py`) en arreglos."""
+    nombres, estaciones, iconos, colores, tipos = [], [], [], [], []
+    linea_estacion, inicio_linea, estacion_maquina, cantidad, capacidad = [], [], [], [], []
+    for l, (nombre_linea, lista) in enumerate(lineas.items()):
+        nombres.append(nombre_linea)
+        inicio_linea.append(len(estaciones))
+        for estacion in lista:
+            k = len(estaciones)
+            estaciones.append(estacion["name"])
+            iconos.append(estacion.get("icon", ""))
+            colores.append(estacion.get("color", "#1f77b4"))
+            linea_estacion.append(l)
+            for m in estacion["machines"]:
+                tipos.append(m["type"])
+                estacion_maquina.append(k)
+                cantidad.append(m["count"])
+                capacidad.append(m["capacity"])
+    return ModeloCapacidad(
+        nombres, estaciones, iconos, colores, tipos,
+        np.asarray(linea_estacion, dtype=int), np.asarray(inicio_linea, dtype=int),
+        np.asarray(estacion_maquina, dtype=int),
+        np.asarray(cantidad, dtype=float), np.asarray(capacidad, dtype=float),
+    )
+
+
+def _por_linea(modelo, valor):
+    # Escalar o vector (líneas,) -> vector (estaciones,)
+    return np.broadcast_to(np.asarray(valor, dtype=float), (len(modelo.lineas),))[modelo.linea_estacion]
+
+
+def calcular_capacidad(modelo, oee, num_turnos, horas_turno, scrap_rate=0.0, cantidad=None, capacidad=None):
+    """Capacidad por estación y cuello de botella de cada línea.
+
+    `oee`, `num_turnos`, `horas_turno` y `scrap_rate` son escalares o un valor
+    por línea. `cantidad`/`capacidad` reemplazan los del modelo y pueden traer
+    un eje inicial de configuraciones para evaluar muchas a la vez.
+    """
+    cantidad = modelo.cantidad if cantidad is None else np.asarray(cantidad, dtype=float)
+    capacidad = modelo.capacidad if capacidad is None else np.asarray(capacidad, dtype=float)
+    n_est = len(modelo.estaciones)
+
+    # Matriz de pertenencia máquina -> estación: la suma por estación es un producto matricial
+    pertenencia = np.zeros((modelo.estacion_maquina.size, n_est))
+    pertenencia[np.arange(modelo.estacion_maquina.size), modelo.estacion_maquina] = 1.0
+    cap_hora = (cantidad * capacidad) @ pertenencia * _por_linea(modelo, oee)
+    cap_diaria = cap_hora * (
+        _por_linea(modelo, num_turnos) * _por_linea(modelo, horas_turno) * (1 - _por_linea(modelo, scrap_rate))
+    )
+
+    cap_linea = np.minimum.reduceat(cap_diaria, modelo.inicio_linea, axis=-1)
+    # Primer índice que alcanza el mínimo de su línea (mismo criterio que idxmin)
+    es_min = cap_diaria == cap_linea[..., modelo.linea_estacion]
+    cuello = np.minimum.reduceat(np.where(es_min, np.arange(n_est), n_est), modelo.inicio_linea, axis=-1)
+    return ResultadoCapacidad(cap_hora, cap_diaria, cap_linea, cuello)
+
+
+def estaciones_de_linea(modelo, linea):
+    """Rango (slice) de índices globales de estación de la línea `linea` (nombre o índice)."""
+    l = modelo.lineas.index(linea) if isinstance(linea, str) else linea
+    fin = modelo.inicio_linea[l + 1] if l + 1 < len(modelo.lineas) else len(modelo.estaciones)
+    return slice(int(modelo.inicio_linea[l]), int(fin))
+
+
+def aporte_diario(modelo, oee, num_turnos, horas_turno, scrap_rate=0.0):
+    """Lentes/día que aporta una sola máquina de cada tipo (máquinas,)."""
+    factor = _por_linea(modelo, oee) * _por_linea(modelo, num_turnos) * _por_linea(modelo, horas_turno) * (
+        1 - _por_linea(modelo, scrap_rate)
+    )
+    return modelo.capacidad * factor[modelo.estacion_maquina]
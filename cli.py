@@ -0,0 +1,231 @@
+"""Modo por lotes: capacidad, cuellos de botella y simulación WIP sin Streamlit.
+
+    python cli.py escenario.json --salida reportes/ --formato parquet
+
+El escenario es un JSON con valores globales que cada línea puede
+sobrescribir:
+
+    {
+      "oee": 0.8, "turnos": 3, "horas_turno": 7, "scrap": 0.0,
+      "lineas": [
+        {"nombre": "SURF", "estaciones": "SURF"},
+        {"nombre": "E&M", "estaciones": "E&M", "oee": 0.85, "horas_turno": 8, "scrap": 0.05}
+      ],
+      "wip": [
+        {"linea": "AR", "desde": "2025-12-01", "hasta": "2025-12-28", "wip_inicial": 1200,
+         "turnos": 3, "cap_ar_por_turno": 290, "lt_pct": 0.30, "surf_capa_pct": 0.08}
+      ]
+    }
+
+`estaciones` es el nombre de una línea de `lineas.py` o la lista de
+estaciones con el mismo formato. Las series WIP salen del almacén local
+(`series.py`, ruta en "base_datos" o CAPACIDAD_SERIES_DB) o de las listas
+"entradas"/"output_3_turnos" con su fecha "desde". Se escriben
+capacidad_<línea>, cuellos_de_botella y wip_<nombre> en el formato pedido;
+"nombre" (por defecto la línea, o "inline") distingue varias simulaciones
+de la misma línea. Dos entradas que darían el mismo archivo son un error.
+
+numpy, pandas y los motores se importan después de leer los argumentos:
+`--help` y los errores de uso no pagan esa carga, y Streamlit/Plotly no se
+importan nunca.
+"""
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+FORMATOS = ("csv", "parquet", "json")
+_POR_DEFECTO = {"oee": 0.80, "turnos": 3, "horas_turno": 7, "scrap": 0.0}
+_POR_DEFECTO_WIP = {"wip_inicial": 0, "turnos": 3, "cap_ar_por_turno": 290, "lt_pct": 0.30, "surf_capa_pct": 0.08}
+
+
+def _nombre_archivo(texto):
+    return re.sub(r"[^\w.-]+", "_", texto).strip("_") or "linea"
+
+
+def _archivos_unicos(nombres, prefijo, clave):
+    # Un archivo por entrada: dos nombres que dan el mismo archivo se pisarían en silencio
+    archivos = [f"{prefijo}_{_nombre_archivo(n)}" for n in nombres]
+    for archivo in dict.fromkeys(archivos):
+        if archivos.count(archivo) > 1:
+            de = [repr(n) for n, a in zip(nombres, archivos) if a == archivo]
+            raise ValueError(f"varias entradas ({', '.join(de)}) dan el mismo archivo {archivo}; usa un \"{clave}\" distinto en cada una")
+    return archivos
+
+
+def _escribir(df, ruta, formato):
+    ruta = ruta.with_suffix(f".{formato}")
+    if formato == "csv":
+        df.to_csv(ruta, index=False)
+    elif formato == "parquet":
+        df.to_parquet(ruta, index=False)
+    else:
+        df.to_json(ruta, orient="records", date_format="iso", force_ascii=False, indent=2)
+    return ruta
+
+
+def _estaciones(valor):
+    import lineas
+
+    if isinstance(valor, list):
+        return valor
+    if not isinstance(valor, str) or valor not in lineas.LINEAS:
+        raise ValueError(f"línea desconocida {valor!r}; opciones: {', '.join(lineas.LINEAS)} o una lista de estaciones")
+    return lineas.LINEAS[valor]
+
+
+def validar_escenario(escenario):
+    """Lanza ValueError con el campo y la entrada si el escenario no tiene la forma esperada.
+
+    Se valida todo antes de escribir: un error no deja reportes a medias.
+    """
+    from lineas import validar_estaciones
+
+    if not isinstance(escenario, dict):
+        raise ValueError(f"se esperaba un objeto JSON, no {type(escenario).__name__}")
+    for clave in ("lineas", "wip"):
+        if not isinstance(escenario.get(clave, []), list):
+            raise ValueError(f"\"{clave}\" debe ser una lista")
+    for i, linea in enumerate(escenario.get("lineas", [])):
+        if not isinstance(linea, dict):
+            raise ValueError(f"lineas[{i}]: se esperaba un objeto, no {linea!r}")
+        if not isinstance(linea.get("nombre"), str):
+            raise ValueError(f"lineas[{i}]: falta \"nombre\" (texto)")
+        try:
+            validar_estaciones(_estaciones(linea.get("estaciones", linea["nombre"])))
+        except ValueError as e:
+            raise ValueError(f"línea {linea['nombre']!r}: {e}") from None
+    for i, sim in enumerate(escenario.get("wip", [])):
+        if not isinstance(sim, dict):
+            raise ValueError(f"wip[{i}]: se esperaba un objeto, no {sim!r}")
+        if "entradas" in sim:
+            if not isinstance(sim["entradas"], list) or "desde" not in sim:
+                raise ValueError(f"wip[{i}]: \"entradas\" debe ser una lista y requiere \"desde\"")
+        elif not isinstance(sim.get("linea"), str):
+            raise ValueError(f"wip[{i}]: falta \"linea\" (o \"entradas\" con \"desde\")")
+
+
+def reporte_capacidad(escenario, salida, formato):
+    """Tabla de capacidad por línea y reporte de cuellos de botella; devuelve las rutas escritas."""
+    import numpy as np
+    import pandas as pd
+
+    from capacidad import calcular_capacidad, construir_modelo
+
+    globales = {k: escenario.get(k, v) for k, v in _POR_DEFECTO.items()}
+    lineas = escenario.get("lineas", [])
+    archivos = _archivos_unicos([linea["nombre"] for linea in lineas], "capacidad", "nombre")
+    rutas, cuellos = [], []
+    for linea, archivo in zip(lineas, archivos):
+        p = {**globales, **{k: linea[k] for k in _POR_DEFECTO if k in linea}}
+        nombre = linea["nombre"]
+        modelo = construir_modelo({nombre: _estaciones(linea.get("estaciones", nombre))})
+        res = calcular_capacidad(modelo, p["oee"], p["turnos"], p["horas_turno"], p["scrap"])
+        cuello = int(res.cuello[0])
+        df = pd.DataFrame({
+            "Estación": modelo.estaciones,
+            "Capacidad hora (teórica)": np.round(res.cap_hora, 3),
+            "Capacidad diaria (real)": np.round(res.cap_diaria, 3),
+            "Cuello de botella": np.arange(len(modelo.estaciones)) == cuello,
+        })
+        rutas.append(_escribir(df, salida / archivo, formato))
+        cuellos.append({
+            "Línea": nombre, "OEE": p["oee"], "Turnos": p["turnos"], "Horas por turno": p["horas_turno"], "Scrap": p["scrap"],
+            "Capacidad diaria (lentes/día)": float(res.cap_linea[0]),
+            "Cuello de botella": modelo.estaciones[cuello],
+        })
+    if cuellos:
+        rutas.append(_escribir(pd.DataFrame(cuellos), salida / "cuellos_de_botella", formato))
+    return rutas
+
+
+def _serie_wip(sim):
+    import numpy as np
+    import pandas as pd
+
+    if "entradas" in sim:
+        fechas = pd.date_range(sim["desde"], periods=len(sim["entradas"]), freq="D")
+        fijos = sim.get("output_3_turnos", [np.nan] * len(fechas))
+        return fechas, np.asarray(sim["entradas"], dtype=float), np.asarray(fijos, dtype=float)
+
+    from series import RUTA_POR_DEFECTO, AlmacenSeries
+
+    almacen = AlmacenSeries(sim.get("base_datos", RUTA_POR_DEFECTO))
+    serie = almacen.consultar_tabla(sim["linea"], ["entradas", "output_3_turnos"], sim.get("desde"), sim.get("hasta"))
+    if serie.empty:
+        raise ValueError(f"sin entradas para la línea {sim['linea']!r} en el almacén {almacen.ruta}")
+    return serie.index, serie["entradas"].fillna(0).to_numpy(), serie["output_3_turnos"].to_numpy()
+
+
+def reporte_wip(escenario, salida, formato):
+    """Simulación WIP diaria (mismo motor que el tab) por cada entrada de "wip"; devuelve las rutas escritas."""
+    import numpy as np
+    import pandas as pd
+
+    from simulacion_wip import UMBRAL_WIP, output_objetivo, simular_wip
+
+    sims = escenario.get("wip", [])
+    # "nombre" distingue varias simulaciones de la misma línea (otro periodo u otros parámetros)
+    nombres = [sim.get("nombre", sim.get("linea", "inline")) for sim in sims]
+    archivos = _archivos_unicos(nombres, "wip", "nombre")
+    rutas, resumen = [], []
+    for sim, nombre, archivo in zip(sims, nombres, archivos):
+        p = {k: sim.get(k, v) for k, v in _POR_DEFECTO_WIP.items()}
+        umbral = sim.get("umbral", UMBRAL_WIP)
+        fechas, entradas, fijos = _serie_wip(sim)
+        objetivo = output_objetivo(entradas, fechas.weekday == 6, p["turnos"], p["cap_ar_por_turno"],
+                                   p["lt_pct"], p["surf_capa_pct"], fijos)
+        res = simular_wip(p["wip_inicial"], entradas, objetivo, umbral=umbral)
+        dia = int(res.dia_estabilizacion[0])
+        df = pd.DataFrame({
+            "Fecha": fechas,
+            "Entradas": entradas,
+            "WIP start (inicio día)": np.round(res.wip_start[0], 2),
+            "Output Objetivo": np.round(objetivo[0], 2),
+            "Salidas": np.round(res.salidas[0], 2),
+            "WIP end (fin día)": np.round(res.wip_end[0], 2),
+            "Estabilizado": (np.arange(len(fechas)) >= dia) if dia >= 0 else False,
+        })
+        rutas.append(_escribir(df, salida / archivo, formato))
+        resumen.append({
+            "nombre": nombre, "linea": sim.get("linea"), **p,
+            "wip_max": float(res.wip_end[0].max()),
+            "dias_sobre_umbral": int((res.wip_end[0] > umbral).sum()),
+            "fecha_estabilizacion": fechas[dia].strftime("%Y-%m-%d") if dia >= 0 else None,
+        })
+    return rutas, resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reportes de capacidad y simulación WIP sin interfaz web.")
+    parser.add_argument("escenario", type=Path, help="archivo JSON con líneas y simulaciones WIP")
+    parser.add_argument("--salida", type=Path, default=Path("reportes"), help="directorio de salida (por defecto: reportes)")
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    args = parser.parse_args(argv)
+
+    try:
+        escenario = json.loads(args.escenario.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        parser.error(f"no se pudo leer el escenario: {e}")
+
+    try:
+        validar_escenario(escenario)
+    except ValueError as e:
+        print(f"error en el escenario: {e}", file=sys.stderr)
+        return 1
+
+    args.salida.mkdir(parents=True, exist_ok=True)
+    try:
+        rutas = reporte_capacidad(escenario, args.salida, args.formato)
+        rutas_wip, resumen = reporte_wip(escenario, args.salida, args.formato)
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"error en el escenario: {e}", file=sys.stderr)
+        return 1
+    # Resumen en stdout (JSON) para encadenar con otros trabajos
+    print(json.dumps({"archivos": [str(r) for r in rutas + rutas_wip], "wip": resumen}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Trazas Plotly para horizontes largos: LTTB + WebGL por encima de un presupuesto de puntos.
+
+Hasta `PRESUPUESTO_PUNTOS` por traza se dibuja igual que siempre (SVG,
+barras); por encima, la serie se reduce con Largest-Triangle-Three-Buckets
+(conserva picos y valles, a diferencia de tomar uno de cada k puntos) y se
+dibuja con `Scattergl`. Así el navegador nunca recibe más que el
+presupuesto por traza, sea un mes diario o varios años horarios.
+"""
+import numpy as np
+import plotly.graph_objs as go
+
+PRESUPUESTO_PUNTOS = 2000
+
+
+def _como_numero(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[s]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def indices_lttb(x, y, n):
+    """Índices de los `n` puntos que LTTB conserva (siempre el primero y el último)."""
+    m = len(y)
+    if n >= m or n < 3:
+        return np.arange(m)
+    x = _como_numero(x)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    # n-2 cubetas entre el primer y el último punto
+    bordes = np.linspace(1, m - 1, n - 1).astype(int)
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        sig_fin = bordes[i + 2] if i + 2 < len(bordes) else m
+        cx, cy = x[fin:sig_fin].mean(), y[fin:sig_fin].mean()
+        # Área del triángulo (punto elegido anterior, candidato, promedio de la cubeta siguiente)
+        area = np.abs((x[a] - cx) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (cy - y[a]))
+        a = inicio + int(area.argmax())
+        indices[i + 1] = a
+    return indices
+
+
+def reducir(x, ys, presupuesto=PRESUPUESTO_PUNTOS, referencia=None):
+    """(x, [y, ...]) con a lo más `presupuesto` puntos, mismos índices para todas las series.
+
+    Los índices salen de `referencia` (p. ej. el total de un área apilada)
+    o de la primera serie.
+    """
+    x = np.asarray(x)
+    if len(x) <= presupuesto:
+        return x, [np.asarray(y) for y in ys]
+    indices = indices_lttb(x, ys[0] if referencia is None else referencia, presupuesto)
+    return x[indices], [np.asarray(y)[indices] for y in ys]
+
+
+def linea(x, y, presupuesto=PRESUPUESTO_PUNTOS, **kwargs):
+    """go.Scatter tal cual hasta el presupuesto; por encima, go.Scattergl con LTTB."""
+    if len(x) <= presupuesto:
+        return go.Scatter(x=x, y=y, **kwargs)
+    x, (y,) = reducir(x, [y], presupuesto)
+    return go.Scattergl(x=x, y=y, **kwargs)
+
+
+def lineas_alineadas(x, ys, kwargs_por_serie, presupuesto=PRESUPUESTO_PUNTOS, referencia=None):
+    """Una traza por serie, todas con los mismos índices LTTB.
+
+    Para bandas con fill="tonexty": con índices propios por traza el
+    relleno uniría puntos de x distintas y las bandas se cruzarían.
+    """
+    tipo = go.Scatter if len(x) <= presupuesto else go.Scattergl
+    x, ys = reducir(x, ys, presupuesto, referencia)
+    return [tipo(x=x, y=y, **kw) for y, kw in zip(ys, kwargs_por_serie)]
+
+
+def barras(x, y, presupuesto=PRESUPUESTO_PUNTOS, **kwargs):
+    """go.Bar hasta el presupuesto; por encima, área Scattergl reducida (miles de barras no se leen)."""
+    if len(x) <= presupuesto:
+        return go.Bar(x=x, y=y, **kwargs)
+    x, (y,) = reducir(x, [y], presupuesto)
+    color = kwargs.pop("marker", {}).get("color")
+    kwargs.pop("opacity", None)
+    return go.Scattergl(x=x, y=y, mode="lines", fill="tozeroy", line=dict(width=1, color=color), **kwargs)
@@ -0,0 +1,111 @@
+"""Ingesta de archivos Excel/CSV con caché en disco por contenido.
+
+El archivo se identifica por el hash de sus bytes: la primera vez se lee
+(Excel con openpyxl en modo read-only) y se guarda una copia columnar en
+Parquet; las siguientes lecturas del mismo contenido, en cualquier sesión,
+cargan directamente el Parquet. La caché tiene un tamaño máximo y desaloja
+los archivos menos usados recientemente (LRU por fecha de modificación).
+"""
+import hashlib
+import io
+import json
+import os
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+DIRECTORIO_CACHE = Path(os.environ.get("CAPACIDAD_CACHE_DIR", Path(__file__).with_name("datos") / "cache_ingesta"))
+LIMITE_CACHE_BYTES = int(os.environ.get("CAPACIDAD_CACHE_BYTES", 512 * 1024 ** 2))
+
+
+def hash_contenido(datos, dtypes=None):
+    """Clave de caché: hash de los bytes del archivo y de los dtypes pedidos."""
+    h = hashlib.blake2b(datos, digest_size=20)
+    if dtypes:
+        h.update(json.dumps({str(k): str(v) for k, v in dtypes.items()}, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _encabezados(celdas):
+    # Como pandas: celdas vacías -> "Unnamed: i"; repetidos -> "x.1", "x.2", ... sin chocar con otros encabezados
+    base = [f"Unnamed: {i}" if c is None or c == "" else str(c) for i, c in enumerate(celdas)]
+    reservados, usados, nombres = set(base), set(), []
+    for nombre in base:
+        if nombre in usados:
+            k = 1
+            while f"{nombre}.{k}" in usados or f"{nombre}.{k}" in reservados:
+                k += 1
+            nombre = f"{nombre}.{k}"
+        usados.add(nombre)
+        nombres.append(nombre)
+    return nombres
+
+
+def _leer_excel(datos, dtypes):
+    # openpyxl read-only + values_only: recorre las filas sin construir celdas con estilo
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        libro = load_workbook(io.BytesIO(datos), read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        raise ValueError(f"no es un libro Excel válido ({e})") from e
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezado = next(filas, ())
+        df = pd.DataFrame.from_records(list(filas), columns=_encabezados(encabezado))
+    finally:
+        libro.close()
+    # Igual que read_csv: las columnas pedidas que no existen se ignoran
+    dtypes = {c: t for c, t in (dtypes or {}).items() if c in df.columns}
+    return df.astype(dtypes) if dtypes else df
+
+
+def _normalizar(df):
+    # Parquet exige nombres de columna texto y tipos homogéneos por columna
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].astype("string")
+    return df
+
+
+def _desalojar(directorio, limite_bytes):
+    archivos = sorted(directorio.glob("*.parquet"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in archivos)
+    for p in archivos:
+        if total <= limite_bytes:
+            break
+        total -= p.stat().st_size
+        p.unlink(missing_ok=True)
+
+
+def leer_tabla(datos, nombre, dtypes=None, directorio=None, limite_bytes=None):
+    """Devuelve el DataFrame del archivo `nombre` (xlsx o csv) con contenido `datos`.
+
+    `dtypes` fija el tipo de las columnas indicadas en lugar de inferirlo.
+    """
+    directorio = Path(directorio or DIRECTORIO_CACHE)
+    limite_bytes = LIMITE_CACHE_BYTES if limite_bytes is None else limite_bytes
+    ruta = directorio / f"{hash_contenido(datos, dtypes)}.parquet"
+
+    if ruta.exists():
+        try:
+            df = pd.read_parquet(ruta)
+            os.utime(ruta)  # marca de uso para el LRU
+            return df
+        except (OSError, ValueError):
+            ruta.unlink(missing_ok=True)  # copia dañada o desalojada a medias: se vuelve a leer
+
+    if nombre.lower().endswith("xlsx"):
+        df = _leer_excel(datos, dtypes)
+    else:
+        df = pd.read_csv(io.BytesIO(datos), dtype=dtypes)
+    df = _normalizar(df)
+
+    directorio.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(temporal, index=False)
+    os.replace(temporal, ruta)  # escritura atómica: otra sesión nunca ve un archivo a medias
+    _desalojar(directorio, limite_bytes)
+    return df
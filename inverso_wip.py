@@ -0,0 +1,111 @@
+"""Preguntas inversas del tab WIP: capacidad mínima y WIP inicial máximo.
+
+"Estabilizado para el día d" significa que el WIP fin de día no supera el
+umbral desde d hasta el final del periodo (el día de estabilización es ≤ d).
+Esa condición es monótona: más capacidad AR por turno nunca sube el WIP de
+ningún día, y más WIP inicial nunca lo baja. Por eso basta una búsqueda
+sobre enteros (lentes): cada paso simula `candidatos` valores repartidos en
+el intervalo todavía abierto en una sola llamada vectorizada de
+`simular_escenarios`, y el intervalo se achica ~`candidatos` veces por
+paso. Con los rangos habituales son 2-4 pasos (milisegundos).
+
+Los extremos salen de los datos: con `cap_ar_por_turno × turnos` igual al
+WIP inicial más todas las entradas, cada día con regla dinámica vacía la
+cola; con WIP inicial mayor que umbral + ∑ output objetivo, el último día
+sigue sobre el umbral. Si ni el extremo cumple no hay solución (p. ej. los
+días con output fijo de 3 turnos, de arranque o domingo no dependen de la
+capacidad AR).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from simulacion_wip import UMBRAL_WIP, ResultadoWIP, dia_estabilizacion, output_objetivo, simular_escenarios, simular_wip
+
+
+class ResultadoInverso(NamedTuple):
+    valor: int                  # capacidad mínima / WIP inicial máximo; None si no hay solución
+    trayectoria: ResultadoWIP   # simulación con `valor` (o con el extremo probado si no hay solución)
+    evaluaciones: int           # escenarios simulados en la búsqueda
+
+
+def _cumple(wip_end, dia_objetivo, umbral):
+    # (escenarios,) True si el WIP fin de día ≤ umbral desde `dia_objetivo` hasta el final
+    return wip_end[:, dia_objetivo:].max(axis=1) <= umbral
+
+
+def _fila(resultado, i, umbral):
+    # Trayectoria de un solo escenario con su día de estabilización
+    wip_end = resultado.wip_end[i:i + 1]
+    return ResultadoWIP(resultado.wip_start[i:i + 1], resultado.salidas[i:i + 1], wip_end,
+                        dia_estabilizacion(wip_end, umbral))
+
+
+def _menor_que_cumple(cumple, bajo, alto, candidatos):
+    """Menor entero en (bajo, alto] con cumple True, sabiendo que cumple(bajo) es False y cumple(alto) True.
+
+    `cumple` recibe un arreglo de valores y devuelve un arreglo booleano.
+    """
+    evaluaciones = 0
+    while alto - bajo > 1:
+        valores = np.unique(np.linspace(bajo, alto, candidatos + 2)[1:-1].round().astype(np.int64))
+        valores = valores[(valores > bajo) & (valores < alto)]
+        if valores.size == 0:
+            break
+        ok = cumple(valores)
+        evaluaciones += valores.size
+        if ok.any():
+            i = int(ok.argmax())
+            alto = int(valores[i])
+            if i > 0:
+                bajo = int(valores[i - 1])
+        else:
+            bajo = int(valores[-1])
+    return alto, evaluaciones
+
+
+def capacidad_minima(entradas, es_domingo, outputs_fijos_tres_turnos, wip_inicial, turnos, lt_pct, surf_capa_pct,
+                     dia_objetivo, umbral=UMBRAL_WIP, candidatos=64):
+    """Menor `cap_ar_por_turno` (entero ≥ 0) con el WIP estabilizado para `dia_objetivo`."""
+    entradas = np.asarray(entradas, dtype=float)
+
+    def simular(caps):
+        return simular_escenarios(entradas, es_domingo, outputs_fijos_tres_turnos, wip_inicial, turnos,
+                                  np.asarray(caps, dtype=float), lt_pct, surf_capa_pct, umbral=None)
+
+    tope = int(np.ceil((wip_inicial + entradas.sum()) / max(turnos, 1))) + 1
+    extremos = simular([0, tope])
+    ok = _cumple(extremos.wip_end, dia_objetivo, umbral)
+    if ok[0]:
+        return ResultadoInverso(0, _fila(extremos, 0, umbral), 2)
+    if not ok[1]:
+        return ResultadoInverso(None, _fila(extremos, 1, umbral), 2)
+
+    valor, evaluaciones = _menor_que_cumple(
+        lambda caps: _cumple(simular(caps).wip_end, dia_objetivo, umbral), 0, tope, candidatos
+    )
+    return ResultadoInverso(valor, _fila(simular([valor]), 0, umbral), evaluaciones + 3)
+
+
+def wip_inicial_maximo(entradas, es_domingo, outputs_fijos_tres_turnos, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct,
+                       dia_objetivo, umbral=UMBRAL_WIP, candidatos=64):
+    """Mayor `wip_inicial` (entero ≥ 0) con el WIP estabilizado para `dia_objetivo`."""
+    entradas = np.asarray(entradas, dtype=float)
+    # El output objetivo no depende del WIP: se calcula una vez para todos los candidatos
+    output_obj = output_objetivo(entradas, es_domingo, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct,
+                                 outputs_fijos_tres_turnos)
+
+    def simular(wips):
+        return simular_wip(np.asarray(wips, dtype=float), entradas, output_obj, umbral=None)
+
+    tope = int(np.ceil(umbral + output_obj.sum())) + 1
+    cero = simular([0])
+    if not _cumple(cero.wip_end, dia_objetivo, umbral)[0]:
+        return ResultadoInverso(None, _fila(cero, 0, umbral), 1)
+
+    # Mayor WIP que cumple = -(menor -WIP que cumple) sobre el intervalo reflejado
+    negativo, evaluaciones = _menor_que_cumple(
+        lambda negs: _cumple(simular(-negs).wip_end, dia_objetivo, umbral), -tope, 0, candidatos
+    )
+    valor = -negativo
+    return ResultadoInverso(valor, _fila(simular([valor]), 0, umbral), evaluaciones + 2)
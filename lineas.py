@@ -0,0 +1,65 @@
+"""Definiciones por defecto de estaciones y máquinas de cada línea.
+
+Capacidades en lentes/hora por máquina. El dashboard las usa como valores
+iniciales de la barra lateral; los motores de cálculo las reciben tal cual.
+"""
+
+# Línea SURF (Superficies), en orden de flujo
+ESTACIONES_SURF = [
+    {"name": "Encintado", "icon": "🟦", "color": "#1f3b6f", "machines": [
+        {"type": "Encintadora Automática", "count": 1, "capacity": 300.0},
+        {"type": "Encintado Manual", "count": 1, "capacity": 0.0}]},
+    {"name": "Bloqueo Digital", "icon": "🟩", "color": "#27ae60", "machines": [
+        {"type": "PRA", "count": 3, "capacity": 80.0}]},
+    {"name": "Generado Digital", "icon": "🟫", "color": "#8d6748", "machines": [
+        {"type": "Orbit", "count": 3, "capacity": 77.0}]},
+    {"name": "Laser", "icon": "🟨", "color": "#f7e017", "machines": [
+        {"type": "Automático", "count": 1, "capacity": 100.0},
+        {"type": "Manual", "count": 1, "capacity": 110.0}]},
+    {"name": "Pulido", "icon": "🟪", "color": "#7d3fc7", "machines": [
+        {"type": "Duo Flex", "count": 2, "capacity": 30.0},
+        {"type": "DLP", "count": 6, "capacity": 27.0}]},
+    {"name": "Desbloqueo", "icon": "⬛", "color": "#222222", "machines": [
+        {"type": "Manual", "count": 1, "capacity": 120},
+        {"type": "Desblocker", "count": 1, "capacity": 120}]},
+    {"name": "Calidad", "icon": "⬜", "color": "#eaeaea", "machines": [
+        {"type": "Foco Vision", "count": 1, "capacity": 60.0},
+        {"type": "Promapper", "count": 1, "capacity": 110.0}]}
+]
+
+# Línea E&M, en orden de flujo
+ESTACIONES_EM = [
+    {"name": "Anaquel", "icon": "🔲", "color": "#8e44ad", "machines": [
+        {"type": "Manual", "count": 1, "capacity": 8*60.0}]},
+    {"name": "Bloqueo", "icon": "🟦", "color": "#2980b9", "machines": [
+        {"type": "Manual", "count": 1, "capacity": 4*60.0}]},
+    {"name": "Corte", "icon": "✂️", "color": "#27ae60", "machines": [
+        {"type": "Bisphera", "count": 1, "capacity": 109.0},
+        {"type": "ES4", "count": 2, "capacity": 34.0},
+        {"type": "MEI641", "count": 1, "capacity": 74.0}]},
+    {"name": "Remate", "icon": "🟨", "color": "#f4d03f", "machines": [
+        {"type": "Manual", "count": 1, "capacity": 64.0}]}
+]
+
+# Líneas predefinidas por nombre (las referencian el CLI y las configuraciones de planta)
+LINEAS = {"SURF": ESTACIONES_SURF, "E&M": ESTACIONES_EM, "EM": ESTACIONES_EM}
+
+
+def validar_estaciones(estaciones):
+    """Lanza ValueError si `estaciones` no tiene el formato de `ESTACIONES_SURF`."""
+    if not isinstance(estaciones, list) or not estaciones:
+        raise ValueError("la línea no tiene estaciones")
+    for e in estaciones:
+        if not isinstance(e, dict) or not isinstance(e.get("name"), str):
+            raise ValueError(f"estación inválida {e!r}: se espera un objeto con 'name' y 'machines'")
+        if not isinstance(e.get("machines"), list) or not e["machines"]:
+            raise ValueError(f"la estación {e['name']!r} no tiene 'machines' (lista de máquinas)")
+        for m in e["machines"]:
+            if not isinstance(m, dict) or not {"type", "count", "capacity"} <= m.keys():
+                raise ValueError(f"máquina inválida en {e['name']!r}: se espera un objeto con 'type', 'count' y 'capacity'")
+            try:
+                negativa = float(m["count"]) < 0 or float(m["capacity"]) < 0
+            except (TypeError, ValueError):
+                raise ValueError(f"cantidad o capacidad no numérica en {e['name']!r} - {m['type']!r}") from None
+            if negativa:
+                raise ValueError(f"cantidad o capacidad negativa en {e['name']!r} - {m['type']!r}")
@@ -0,0 +1,175 @@
+"""Importación por trozos de logs de máquinas a throughput por hora.
+
+Lee logs de eventos (CSV o Excel) de millones de filas en trozos, asigna
+cada fila a una máquina de las estaciones configuradas (`lineas.py`) y
+acumula lentes por (máquina, hora). La memoria depende del número de
+máquinas × horas del log, no del número de filas. Del acumulado salen la
+capacidad empírica (lentes/hora por unidad) y el OEE empírico de cada tipo.
+
+El P95 observado ya incluye las pérdidas reales, así que hay dos OEE: contra
+la capacidad nominal (para usar con las capacidades de `lineas.py`) y contra
+el P95 (para usar con `estaciones_empiricas`). Mezclar P95 con el OEE
+nominal descontaría las pérdidas dos veces.
+"""
+import io
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+TAM_TROZO = 250_000
+PERCENTIL_CAPACIDAD = 95
+_HORAS_BITS = 32  # la hora (desde 1970) ocupa los bits bajos de la clave
+
+
+class ResultadoLogs(NamedTuple):
+    tabla: pd.DataFrame         # una fila por tipo de máquina configurado
+    por_hora: pd.DataFrame      # hora, Estación, Máquina, Lentes (formato largo)
+    filas_leidas: int
+    filas_sin_mapear: int
+
+
+def _trozos(fuente, nombre, columnas, dtypes, tam_trozo):
+    # CSV con chunksize; Excel con openpyxl read-only agrupando filas en lotes
+    if nombre.lower().endswith("xlsx"):
+        from openpyxl import load_workbook
+
+        libro = load_workbook(fuente if isinstance(fuente, str) else io.BytesIO(fuente), read_only=True, data_only=True)
+        try:
+            filas = libro.worksheets[0].iter_rows(values_only=True)
+            encabezado = [str(c) for c in next(filas, ())]
+            posiciones = [encabezado.index(c) for c in columnas]
+            lote = []
+            for fila in filas:
+                lote.append([fila[p] for p in posiciones])
+                if len(lote) == tam_trozo:
+                    yield pd.DataFrame(lote, columns=columnas)
+                    lote = []
+            if lote:
+                yield pd.DataFrame(lote, columns=columnas)
+        finally:
+            libro.close()
+    else:
+        fuente = fuente if isinstance(fuente, str) else io.BytesIO(fuente)
+        yield from pd.read_csv(fuente, usecols=columnas, chunksize=tam_trozo, dtype=dtypes)
+
+
+def _indice_maquinas(estaciones):
+    # "estación|tipo" -> índice, y tipo -> índice cuando el tipo es único en la línea
+    por_par, por_tipo, repetidos = {}, {}, set()
+    filas = []
+    for estacion in estaciones:
+        for m in estacion["machines"]:
+            i = len(filas)
+            filas.append((estacion["name"], m["type"], m["count"], m["capacity"]))
+            tipo = m["type"].strip().lower()
+            por_par[f"{estacion['name'].strip().lower()}|{tipo}"] = i
+            if tipo in por_tipo:
+                repetidos.add(tipo)
+            por_tipo[tipo] = i
+    for tipo in repetidos:
+        del por_tipo[tipo]
+    return filas, por_par, por_tipo
+
+
+def importar_logs(fuente, nombre, estaciones, col_fecha="fecha", col_maquina="maquina", col_estacion=None,
+                  col_lentes=None, col_equipo=None, tam_trozo=TAM_TROZO):
+    """Throughput por hora y capacidad/OEE empíricos a partir de un log de eventos.
+
+    `fuente` es una ruta o los bytes del archivo. Cada fila es un evento con
+    fecha-hora y tipo de máquina; `col_estacion` desambigua tipos repetidos
+    entre estaciones (p. ej. "Manual"), `col_lentes` da los lentes del
+    evento (1 si se omite) y `col_equipo` identifica la unidad física para
+    contar cuántas máquinas de cada tipo reportan (si no, se usa `count`).
+    """
+    filas_cfg, por_par, por_tipo = _indice_maquinas(estaciones)
+    columnas = [c for c in (col_fecha, col_maquina, col_estacion, col_lentes, col_equipo) if c]
+
+    claves = np.empty(0, dtype=np.int64)
+    lentes = np.empty(0)
+    equipos = set()
+    leidas = sin_mapear = 0
+    # Texto explícito para las columnas de identificación; lentes se infiere como número
+    dtypes = {c: "string" for c in (col_fecha, col_maquina, col_estacion, col_equipo) if c}
+    for trozo in _trozos(fuente, nombre, columnas, dtypes, tam_trozo):
+        leidas += len(trozo)
+        tipo = trozo[col_maquina].astype("string").str.strip().str.lower()
+        if col_estacion:
+            par = trozo[col_estacion].astype("string").str.strip().str.lower() + "|" + tipo
+            idx = par.map(por_par).fillna(tipo.map(por_tipo))
+        else:
+            idx = tipo.map(por_tipo)
+        hora = pd.to_datetime(trozo[col_fecha], errors="coerce")
+        validas = idx.notna().to_numpy() & hora.notna().to_numpy()
+        sin_mapear += int((~validas).sum())
+
+        idx = idx[validas].to_numpy(dtype=np.int64)
+        horas = hora[validas].to_numpy().astype("datetime64[h]").astype(np.int64)
+        cantidad = (pd.to_numeric(trozo[col_lentes][validas], errors="coerce").fillna(0).to_numpy(dtype=float)
+                    if col_lentes else np.ones(idx.size))
+        if col_equipo:
+            equipos.update(zip(idx.tolist(), trozo[col_equipo][validas].astype(str).tolist()))
+
+        # Reducir trozo + acumulado a una entrada por (máquina, hora)
+        claves, inversa = np.unique(np.concatenate([claves, (idx << _HORAS_BITS) | horas]), return_inverse=True)
+        lentes = np.bincount(inversa, weights=np.concatenate([lentes, cantidad]), minlength=claves.size)
+
+    maquina = claves >> _HORAS_BITS
+    hora = claves & ((1 << _HORAS_BITS) - 1)
+    unidades = np.array([c[2] for c in filas_cfg], dtype=float)
+    if col_equipo:
+        reportan = np.bincount([i for i, _ in equipos], minlength=len(filas_cfg))
+        unidades = np.where(reportan > 0, reportan, unidades)
+
+    registros = []
+    for i, (est, tipo, _, capacidad) in enumerate(filas_cfg):
+        por_hora = lentes[maquina == i]
+        activas = int((por_hora > 0).sum())
+        total = float(por_hora.sum())
+        medio = total / activas if activas else np.nan
+        p95 = np.percentile(por_hora, PERCENTIL_CAPACIDAD) if activas else np.nan
+        registros.append({
+            "Estación": est,
+            "Máquina": tipo,
+            "Unidades": int(unidades[i]),
+            "Horas activas": activas,
+            "Lentes": total,
+            "Throughput medio (lentes/hora)": medio,
+            "Capacidad empírica (lentes/hora/máquina)": p95 / unidades[i] if activas else np.nan,
+            "OEE empírico": medio / (unidades[i] * capacidad) if activas and capacidad > 0 else np.nan,
+            "OEE vs. capacidad empírica": medio / p95 if activas and p95 > 0 else np.nan,
+        })
+
+    por_hora = pd.DataFrame({
+        "Hora": hora.astype("datetime64[h]"),
+        "Estación": [filas_cfg[i][0] for i in maquina],
+        "Máquina": [filas_cfg[i][1] for i in maquina],
+        "Lentes": lentes,
+    })
+    return ResultadoLogs(pd.DataFrame(registros), por_hora, leidas, sin_mapear)
+
+
+def estaciones_empiricas(estaciones, resultado):
+    """Copia de `estaciones` con la capacidad empírica donde el log tiene datos."""
+    empirica = resultado.tabla.set_index(["Estación", "Máquina"])["Capacidad empírica (lentes/hora/máquina)"]
+    nuevas = []
+    for estacion in estaciones:
+        machines = []
+        for m in estacion["machines"]:
+            valor = empirica.get((estacion["name"], m["type"]), np.nan)
+            machines.append({**m, "capacity": float(np.round(valor, 1)) if pd.notna(valor) else m["capacity"]})
+        nuevas.append({**estacion, "machines": machines})
+    return nuevas
+
+
+def oee_empirico(resultado, base="empirica"):
+    """OEE de la línea ponderado por lentes (None si el log no alcanza).
+
+    `base="empirica"` lo mide contra el P95 (va con `estaciones_empiricas`);
+    `base="nominal"`, contra las capacidades configuradas.
+    """
+    columna = {"empirica": "OEE vs. capacidad empírica", "nominal": "OEE empírico"}[base]
+    t = resultado.tabla.dropna(subset=[columna])
+    if t.empty or t["Lentes"].sum() == 0:
+        return None
+    return float(np.average(t[columna], weights=t["Lentes"]))
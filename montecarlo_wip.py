@@ -0,0 +1,155 @@
+"""Simulación WIP estocástica (Monte Carlo) sobre el motor vectorizado.
+
+Perturba las entradas diarias y la capacidad del cuello de botella AR
+(solo el término cap_ar_dia de los días con regla dinámica: los días de
+arranque, los domingos y los de output fijo de 3 turnos son planificados y
+no dependen de la capacidad AR), simula
+decenas de miles de réplicas repartidas en un pool de procesos y resume los
+resultados en bandas de percentiles y probabilidad de estabilización.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from simulacion_wip import UMBRAL_WIP, output_objetivo, simular_wip
+
+DISTRIBUCIONES_ENTRADAS = ("normal", "lognormal", "poisson", "bootstrap")
+DISTRIBUCIONES_CAPACIDAD = ("ninguna", "normal", "lognormal")
+PERCENTILES = (50, 90, 99)
+# Por debajo de este número de celdas (réplicas × días) el pool no compensa
+CELDAS_MIN_PARALELO = 5_000_000
+
+_pool = None
+_pool_procesos = 0
+_bloqueo_pool = threading.Lock()  # cada sesión de Streamlit corre en su propio hilo
+
+
+class ResultadoMonteCarlo(NamedTuple):
+    bandas_wip: dict             # percentil -> (días,) WIP fin de día
+    prob_estable: np.ndarray     # (días,) P(estabilizado ≤ umbral a más tardar ese día)
+    dia_estabilizacion: np.ndarray  # (réplicas,) -1 si nunca
+    wip_max: np.ndarray          # (réplicas,) pico de WIP fin de día
+
+
+def _factor_multiplicativo(rng, forma, distribucion, cv):
+    # Factor de media 1 y coeficiente de variación `cv`, nunca negativo
+    if distribucion == "normal":
+        return np.clip(1.0 + cv * rng.standard_normal(forma), 0.0, None)
+    if distribucion == "lognormal":
+        sigma = np.sqrt(np.log1p(cv ** 2))
+        return rng.lognormal(-sigma ** 2 / 2, sigma, forma)
+    raise ValueError(f"Distribución desconocida: {distribucion}")
+
+
+def muestrear_entradas(rng, entradas, n, distribucion="normal", cv=0.2, dia_semana=None):
+    """Genera `n` series de entradas (n, días) a partir de la serie base.
+
+    `bootstrap` remuestrea, para cada día, entradas históricas del mismo día
+    de la semana (`dia_semana`, 0 = lunes); el resto perturba la serie base.
+    """
+    entradas = np.asarray(entradas, dtype=float)
+    if distribucion == "poisson":
+        return rng.poisson(entradas, (n, entradas.size)).astype(float)
+    if distribucion == "bootstrap":
+        if dia_semana is None:
+            dia_semana = np.zeros(entradas.size, dtype=int)
+        dia_semana = np.asarray(dia_semana)
+        muestras = np.empty((n, entradas.size))
+        for dia in np.unique(dia_semana):
+            columnas = np.flatnonzero(dia_semana == dia)
+            eleccion = rng.integers(columnas.size, size=(n, columnas.size))
+            muestras[:, columnas] = entradas[columnas][eleccion]
+        return muestras
+    return entradas * _factor_multiplicativo(rng, (n, entradas.size), distribucion, cv)
+
+
+def _simular_lote(semilla, n, entradas, dia_semana, outputs_fijos_tres_turnos, parametros,
+                  dist_entradas, cv_entradas, dist_capacidad, cv_capacidad, umbral):
+    # Se ejecuta en el proceso trabajador: cada lote tiene su propia semilla
+    rng = np.random.default_rng(semilla)
+    es_domingo = dia_semana == 6
+    muestras = muestrear_entradas(rng, entradas, n, dist_entradas, cv_entradas, dia_semana)
+    output_obj = output_objetivo(
+        muestras, es_domingo, parametros["turnos"], parametros["cap_ar_por_turno"],
+        parametros["lt_pct"], parametros["surf_capa_pct"], outputs_fijos_tres_turnos,
+    )
+    if dist_capacidad != "ninguna":
+        # El output es afín en la capacidad AR: la diferencia con capacidad 0 es el término
+        # cap_ar_dia, que vale 0 en los días planificados. Solo ese término se perturba.
+        sin_ar = output_objetivo(
+            muestras, es_domingo, parametros["turnos"], 0.0,
+            parametros["lt_pct"], parametros["surf_capa_pct"], outputs_fijos_tres_turnos,
+        )
+        factor = _factor_multiplicativo(rng, output_obj.shape, dist_capacidad, cv_capacidad)
+        output_obj = sin_ar + (output_obj - sin_ar) * factor
+    r = simular_wip(parametros["wip_inicial"], muestras, output_obj, umbral=umbral)
+    return r.wip_end.astype(np.float32), r.dia_estabilizacion
+
+
+def _mapear_en_pool(n_procesos, funcion, *iterables):
+    # El pool se reutiliza entre llamadas para no pagar el arranque cada vez.
+    # spawn: los trabajadores no heredan los hilos del servidor Streamlit.
+    # Crear/reemplazar el pool y enviar las tareas ocurre bajo el bloqueo: otra
+    # sesión no puede apagar el pool entre que se obtiene y se le envía trabajo
+    # (map envía todo de inmediato; un pool apagado con wait=False termina lo
+    # ya enviado). Los resultados se esperan fuera del bloqueo.
+    global _pool, _pool_procesos
+    with _bloqueo_pool:
+        if _pool is None or _pool_procesos != n_procesos:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=n_procesos, mp_context=multiprocessing.get_context("spawn"))
+            _pool_procesos = n_procesos
+        resultados = _pool.map(funcion, *iterables)
+    return list(resultados)
+
+
+def simular_montecarlo(entradas, dia_semana, outputs_fijos_tres_turnos, parametros, n_replicas=10000,
+                       dist_entradas="normal", cv_entradas=0.2, dist_capacidad="normal",
+                       cv_capacidad=0.1, semilla=0, n_procesos=None, tam_lote=2500,
+                       umbral=UMBRAL_WIP):
+    """Ejecuta `n_replicas` simulaciones WIP con entradas y capacidad aleatorias.
+
+    `dia_semana` (0 = lunes, 6 = domingo) define los domingos y los grupos
+    del bootstrap. `parametros` es un dict con wip_inicial, turnos,
+    cap_ar_por_turno, lt_pct y surf_capa_pct. Las réplicas se reparten en
+    lotes de `tam_lote`; cada lote recibe una semilla hija de `semilla`, así
+    que el resultado es el mismo con cualquier número de procesos. Con
+    `n_procesos=None` se usan todos los núcleos solo si la carga lo amerita.
+    """
+    if dist_entradas not in DISTRIBUCIONES_ENTRADAS:
+        raise ValueError(f"Distribución de entradas desconocida: {dist_entradas}")
+    if dist_capacidad not in DISTRIBUCIONES_CAPACIDAD:
+        raise ValueError(f"Distribución de capacidad desconocida: {dist_capacidad}")
+
+    entradas = np.asarray(entradas, dtype=float)
+    dia_semana = np.asarray(dia_semana, dtype=int)
+    tamanos = [min(tam_lote, n_replicas - ini) for ini in range(0, n_replicas, tam_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    argumentos = [
+        (s, n, entradas, dia_semana, outputs_fijos_tres_turnos, parametros,
+         dist_entradas, cv_entradas, dist_capacidad, cv_capacidad, umbral)
+        for s, n in zip(semillas, tamanos)
+    ]
+
+    if n_procesos is None:
+        grande = n_replicas * entradas.size >= CELDAS_MIN_PARALELO
+        n_procesos = (os.cpu_count() or 1) if grande else 1
+    n_procesos = min(n_procesos, len(argumentos))
+    if n_procesos <= 1:
+        lotes = [_simular_lote(*a) for a in argumentos]
+    else:
+        lotes = _mapear_en_pool(n_procesos, _simular_lote, *zip(*argumentos))
+
+    wip_end = np.concatenate([w for w, _ in lotes])
+    dia_est = np.concatenate([d for _, d in lotes])
+
+    bandas = dict(zip(PERCENTILES, np.percentile(wip_end, PERCENTILES, axis=0)))
+    estable = dia_est >= 0
+    conteo = np.bincount(dia_est[estable], minlength=wip_end.shape[1])
+    prob_estable = np.cumsum(conteo) / n_replicas
+    return ResultadoMonteCarlo(bandas, prob_estable, dia_est, wip_end.max(axis=1))
@@ -0,0 +1,180 @@
+"""Optimizador de inversión en máquinas sobre el motor de capacidad.
+
+La capacidad de la línea es la mínima entre estaciones y el costo es la
+suma por estación, así que el problema se separa: cada estación resuelve su
+propio problema de cobertura entera (comprar máquinas hasta llegar al
+objetivo diario) con ramificación y acotamiento. Las cantidades actuales son
+el mínimo (solo se agregan máquinas).
+"""
+from bisect import bisect_left
+from math import ceil, inf
+from typing import NamedTuple
+
+import numpy as np
+
+from capacidad import aporte_diario, calcular_capacidad
+
+_TOL = 1e-9
+
+
+class ResultadoInversion(NamedTuple):
+    factible: bool
+    costo: float                # costo de las máquinas adicionales
+    adicionales: np.ndarray     # (máquinas,) máquinas a comprar de cada tipo
+    cantidad: np.ndarray        # (máquinas,) cantidades finales
+    cap_linea: np.ndarray       # (líneas,) capacidad diaria resultante
+
+
+def _cota_lineal(requerido, tipos, desde):
+    # Relajación lineal: llenar lo requerido con los tipos más baratos por lente
+    # (ya ordenados por costo/aporte); cota inferior del costo restante.
+    costo = 0.0
+    for aporte, precio, maximo, _ in tipos[desde:]:
+        if requerido <= _TOL:
+            return costo
+        usar = requerido / aporte if maximo is None else min(requerido / aporte, maximo)
+        costo += usar * precio
+        requerido -= usar * aporte
+    return costo if requerido <= _TOL else inf
+
+
+def _cubrir_estacion(requerido, tipos):
+    """Mínimo costo entero para sumar `requerido` lentes/día en una estación.
+
+    `tipos` es una lista (aporte, precio, máximo o None, índice de máquina).
+    Devuelve (costo, {índice: unidades}) o (inf, None) si no es alcanzable.
+    """
+    if requerido <= _TOL:
+        return 0.0, {}
+    tipos = sorted((t for t in tipos if t[0] > 0 and t[2] != 0), key=lambda t: t[1] / t[0])
+    mejor = [inf, None]
+    elegido = [0] * len(tipos)
+
+    def ramificar(i, requerido, costo):
+        if requerido <= _TOL:
+            if costo < mejor[0] - _TOL:
+                mejor[0] = costo
+                mejor[1] = {tipos[k][3]: n for k, n in enumerate(elegido) if n}
+            return
+        if i == len(tipos) or costo + _cota_lineal(requerido, tipos, i) >= mejor[0] - _TOL:
+            return
+        aporte, precio, maximo, _ = tipos[i]
+        tope = ceil(requerido / aporte - _TOL)
+        if maximo is not None:
+            tope = min(tope, maximo)
+        # Primero la opción más cargada al tipo más barato: encuentra buenas cotas pronto
+        for n in range(tope, -1, -1):
+            elegido[i] = n
+            ramificar(i + 1, requerido - n * aporte, costo + n * precio)
+        elegido[i] = 0
+
+    ramificar(0, requerido, 0.0)
+    return mejor[0], mejor[1]
+
+
+def _tipos_por_estacion(modelo, aporte, costos, max_adicional):
+    costos = np.broadcast_to(np.asarray(costos, dtype=float), modelo.cantidad.shape)
+    if max_adicional is None:
+        maximos = [None] * modelo.cantidad.size
+    else:
+        maximos = [None if m is None or m < 0 else int(m)
+                   for m in np.broadcast_to(np.asarray(max_adicional, dtype=object), modelo.cantidad.shape)]
+    tipos = [[] for _ in modelo.estaciones]
+    for i, k in enumerate(modelo.estacion_maquina):
+        tipos[k].append((float(aporte[i]), float(costos[i]), maximos[i], i))
+    return tipos
+
+
+def configuracion_minima(modelo, costos, objetivo, oee, num_turnos, horas_turno, scrap_rate=0.0,
+                         max_adicional=None):
+    """Configuración de menor costo cuya capacidad diaria (real) alcanza `objetivo`.
+
+    `costos` y `max_adicional` son escalares o un valor por máquina del
+    modelo (`max_adicional` None o negativo = sin límite). `objetivo` es un
+    escalar o un valor por línea.
+    """
+    aporte = aporte_diario(modelo, oee, num_turnos, horas_turno, scrap_rate)
+    actual = calcular_capacidad(modelo, oee, num_turnos, horas_turno, scrap_rate)
+    objetivo = np.broadcast_to(np.asarray(objetivo, dtype=float), (len(modelo.lineas),))
+
+    adicionales = np.zeros(modelo.cantidad.size, dtype=int)
+    costo_total = 0.0
+    for k, tipos in enumerate(_tipos_por_estacion(modelo, aporte, costos, max_adicional)):
+        requerido = objetivo[modelo.linea_estacion[k]] - actual.cap_diaria[k]
+        costo, compra = _cubrir_estacion(requerido, tipos)
+        if compra is None:
+            return ResultadoInversion(False, inf, adicionales, modelo.cantidad.copy(), actual.cap_linea)
+        costo_total += costo
+        for i, n in compra.items():
+            adicionales[i] = n
+
+    cantidad = modelo.cantidad + adicionales
+    final = calcular_capacidad(modelo, oee, num_turnos, horas_turno, scrap_rate, cantidad=cantidad)
+    return ResultadoInversion(True, costo_total, adicionales, cantidad, final.cap_linea)
+
+
+def _frontera_estacion(base, tipos, tope):
+    # Puntos no dominados (costo, capacidad, compra) de una estación, con la
+    # capacidad truncada en `tope` (más allá no mejora a la línea).
+    puntos = [(0.0, min(base, tope), ())]
+    for aporte, precio, maximo, i in tipos:
+        if aporte <= 0:
+            continue
+        nuevos = []
+        for costo, cap, compra in puntos:
+            faltan = ceil((tope - cap) / aporte - _TOL) if cap < tope else 0
+            n_max = faltan if maximo is None else min(faltan, maximo)
+            for n in range(n_max + 1):
+                nuevos.append((costo + n * precio, min(cap + n * aporte, tope), compra + ((i, n),) if n else compra))
+        nuevos.sort(key=lambda p: (p[0], -p[1]))
+        puntos = []
+        for p in nuevos:
+            if not puntos or p[1] > puntos[-1][1] + _TOL:
+                puntos.append(p)
+    return puntos
+
+
+def frontera_pareto(modelo, costos, cap_max, oee, num_turnos, horas_turno, scrap_rate=0.0,
+                    max_adicional=None, linea=0):
+    """Frontera costo vs. capacidad diaria de la línea `linea` hasta `cap_max`.
+
+    Devuelve una lista de (costo, capacidad_linea, adicionales) ordenada por
+    costo, donde ningún punto es dominado (más barato y con más capacidad).
+    """
+    aporte = aporte_diario(modelo, oee, num_turnos, horas_turno, scrap_rate)
+    actual = calcular_capacidad(modelo, oee, num_turnos, horas_turno, scrap_rate)
+    tipos = _tipos_por_estacion(modelo, aporte, costos, max_adicional)
+    estaciones = [k for k in range(len(modelo.estaciones)) if modelo.linea_estacion[k] == linea]
+
+    fronteras = [_frontera_estacion(actual.cap_diaria[k], tipos[k], cap_max) for k in estaciones]
+    capacidades = [[p[1] for p in f] for f in fronteras]
+    candidatos = sorted({cap for caps in capacidades for cap in caps if cap >= actual.cap_linea[linea] - _TOL})
+
+    puntos = []
+    for objetivo in candidatos:
+        costo, cap_linea, compra = 0.0, inf, {}
+        for f, caps in zip(fronteras, capacidades):
+            j = bisect_left(caps, objetivo - _TOL)
+            if j == len(f):
+                break
+            costo += f[j][0]
+            cap_linea = min(cap_linea, f[j][1])
+            compra.update(f[j][2])
+        else:
+            adicionales = np.zeros(modelo.cantidad.size, dtype=int)
+            for i, n in compra.items():
+                adicionales[i] = n
+            puntos.append((costo, cap_linea, adicionales))
+
+    if not puntos:
+        return []
+    # Capacidad real de cada punto (la de las fronteras está truncada en cap_max)
+    adicionales = np.array([p[2] for p in puntos])
+    reales = calcular_capacidad(modelo, oee, num_turnos, horas_turno, scrap_rate,
+                                cantidad=modelo.cantidad + adicionales).cap_linea[:, linea]
+    puntos = sorted(((p[0], float(cap), p[2]) for p, cap in zip(puntos, reales)), key=lambda p: (p[0], -p[1]))
+    frontera = []
+    for p in puntos:
+        if not frontera or p[1] > frontera[-1][1] + _TOL:
+            frontera.append(p)
+    return frontera
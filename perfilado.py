@@ -0,0 +1,168 @@
+"""Perfilado opcional por corrida: tiempo, memoria pico y bytes por sección.
+
+    perf = Perfilador(activo=True)
+    with perf.seccion("simulación WIP") as s:
+        resultado = simular_wip(...)
+    with perf.seccion("CSV descarga") as s:
+        datos = s.payload(df.to_csv().encode())
+
+Cada sección registra el tiempo de pared (perf_counter), los bytes de lo
+que se envía al navegador si se llama a `payload` y, con `medir_memoria`,
+el pico de memoria de Python/numpy por encima de lo que había al entrar
+(tracemalloc). Las secciones pueden anidarse; el nombre registrado es la
+ruta ("tab/figura"). Cada sección cerrada se agrega como una línea JSON al
+log.
+
+Inactivo no mide nada. La memoria solo se mide si el servidor arrancó con
+CAPACIDAD_PERFILADO=1 (`?perfilado=1` en la URL da tiempos y payload):
+tracemalloc es global al proceso y frena el código 2-3×, así que se
+arranca al entrar a la sección más externa y se detiene al salir (si no lo
+había arrancado otro), y las secciones externas que miden memoria se
+ejecutan de a una para que una sesión no borre el pico de otra (lo que otra
+sesión asigne fuera de sus secciones sí puede sumarse al pico).
+
+En el dashboard, las reejecuciones de un fragmento escriben en el perfilador
+de la última corrida completa: quedan en el log con ese id de corrida, pero
+el panel solo muestra la corrida completa.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+ACTIVO_POR_DEFECTO = os.environ.get("CAPACIDAD_PERFILADO", "") not in ("", "0")
+RUTA_LOG = Path(os.environ.get("CAPACIDAD_PERFILADO_LOG", Path(__file__).with_name("datos") / "perfilado.jsonl"))
+
+_bloqueo_log = threading.Lock()
+# Una sección externa con medición de memoria a la vez: reset_peak y el pico son globales al proceso
+_bloqueo_memoria = threading.Lock()
+
+
+def tamano_payload(objeto):
+    """Bytes aproximados que viajan al navegador: bytes/str, figuras Plotly (JSON) o DataFrames."""
+    if objeto is None:
+        return 0
+    if isinstance(objeto, (bytes, bytearray)):
+        return len(objeto)
+    if isinstance(objeto, str):
+        return len(objeto.encode("utf-8"))
+    if hasattr(objeto, "to_plotly_json"):
+        return len(objeto.to_json())
+    if hasattr(objeto, "memory_usage"):
+        return int(objeto.memory_usage(index=True, deep=True).sum())
+    return 0
+
+
+class _Seccion:
+    __slots__ = ("nombre", "bytes", "pico")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.bytes = 0
+        self.pico = 0  # pico absoluto de tracemalloc visto por las secciones hijas
+
+    def payload(self, objeto):
+        """Suma el tamaño de `objeto` a la sección y lo devuelve sin cambios."""
+        self.bytes += tamano_payload(objeto)
+        return objeto
+
+
+class _SeccionInactiva:
+    __slots__ = ()
+
+    def payload(self, objeto):
+        return objeto
+
+
+_INACTIVA = _SeccionInactiva()
+
+
+class Perfilador:
+    """Registro de secciones de una corrida del script (un objeto por corrida)."""
+
+    def __init__(self, activo=ACTIVO_POR_DEFECTO, ruta_log=RUTA_LOG, medir_memoria=ACTIVO_POR_DEFECTO, etiqueta=""):
+        self.activo = activo
+        self.ruta_log = Path(ruta_log) if ruta_log else None
+        self.medir_memoria = activo and medir_memoria
+        self.corrida = uuid.uuid4().hex[:12]
+        self.etiqueta = etiqueta
+        self.registros = []
+        self._pila = []
+        self._arranco_tracemalloc = False
+        self._inicio = time.perf_counter()
+
+    def _entrar_memoria(self):
+        # Sección más externa: toma el turno y arranca tracemalloc si nadie lo tenía activo
+        _bloqueo_memoria.acquire()
+        self._arranco_tracemalloc = not tracemalloc.is_tracing()
+        if self._arranco_tracemalloc:
+            tracemalloc.start()
+
+    def _salir_memoria(self):
+        if self._arranco_tracemalloc:
+            tracemalloc.stop()
+            self._arranco_tracemalloc = False
+        _bloqueo_memoria.release()
+
+    @contextmanager
+    def seccion(self, nombre):
+        if not self.activo:
+            yield _INACTIVA
+            return
+        seccion = _Seccion(nombre)
+        ruta = "/".join([s.nombre for s in self._pila] + [nombre])
+        memoria_inicial = 0
+        if self.medir_memoria and not self._pila:
+            self._entrar_memoria()
+        if self.medir_memoria:
+            memoria_inicial, pico = tracemalloc.get_traced_memory()
+            if self._pila:
+                # reset_peak borra el pico de la sección padre: se lo guarda antes
+                self._pila[-1].pico = max(self._pila[-1].pico, pico)
+            tracemalloc.reset_peak()
+        self._pila.append(seccion)
+        inicio = time.perf_counter()
+        try:
+            yield seccion
+        finally:
+            tiempo = time.perf_counter() - inicio
+            self._pila.pop()
+            pico = 0
+            if self.medir_memoria:
+                pico = max(tracemalloc.get_traced_memory()[1], seccion.pico)
+                if self._pila:
+                    self._pila[-1].pico = max(self._pila[-1].pico, pico)
+                else:
+                    self._salir_memoria()
+            self._registrar({
+                "seccion": ruta,
+                "tiempo_s": round(tiempo, 6),
+                "memoria_pico_bytes": max(pico - memoria_inicial, 0),
+                "payload_bytes": seccion.bytes,
+            })
+
+    def _registrar(self, registro):
+        registro = {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "corrida": self.corrida,
+            "etiqueta": self.etiqueta,
+            **registro,
+        }
+        self.registros.append(registro)
+        if self.ruta_log is None:
+            return
+        try:
+            self.ruta_log.parent.mkdir(parents=True, exist_ok=True)
+            with _bloqueo_log, open(self.ruta_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError:
+            self.ruta_log = None  # sin permiso de escritura: se sigue perfilando en memoria
+
+    def total(self):
+        """Segundos desde que empezó la corrida."""
+        return time.perf_counter() - self._inicio
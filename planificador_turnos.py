@@ -0,0 +1,90 @@
+"""Plan de turnos por día: mínimas horas-turno con WIP fin de día ≤ umbral.
+
+Programación dinámica sobre (día, cubeta de WIP). Cada día se prueba cada
+número de turnos permitido; el output del día sale de la misma regla del
+tab WIP (`output_objetivo`) y el WIP evoluciona como en `simular_wip`. De
+todos los caminos que caen en la misma cubeta se conserva el de menor
+costo (y, a igual costo, el de menor WIP), guardando su WIP exacto: la
+cubeta solo decide qué caminos se fusionan, así que no se acumula error de
+redondeo día a día.
+
+El costo es lexicográfico: primero los días con WIP > umbral (si el WIP
+inicial o las entradas hacen imposible cumplir todos los días, el plan
+minimiza los incumplimientos) y después las horas-turno. Un año con ~600
+cubetas y 4 opciones de turnos se resuelve en una fracción de segundo.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from simulacion_wip import UMBRAL_WIP, output_objetivo, simular_wip
+
+OPCIONES_TURNOS = (1, 2, 3, 4)
+
+
+class ResultadoPlan(NamedTuple):
+    turnos: np.ndarray          # (días,) turnos elegidos
+    output: np.ndarray          # (días,) output objetivo con esos turnos
+    wip_end: np.ndarray         # (días,) WIP fin de día del plan
+    horas_turno: float          # total de horas-turno del plan
+    dias_sobre_umbral: int
+
+
+def planificar_turnos(entradas, es_domingo, outputs_fijos_tres_turnos, wip_inicial, cap_ar_por_turno, lt_pct,
+                      surf_capa_pct, umbral=UMBRAL_WIP, opciones=OPCIONES_TURNOS, horas_por_turno=7.0,
+                      resolucion=None, wip_tope=None):
+    """Turnos por día que minimizan (días sobre `umbral`, horas-turno).
+
+    `resolucion` es el ancho de cubeta en lentes (por defecto umbral/200) y
+    `wip_tope` el WIP desde el cual todo cae en la última cubeta (por
+    defecto el mayor entre WIP inicial y umbral más dos días de la entrada
+    máxima).
+    """
+    entradas = np.asarray(entradas, dtype=float)
+    opciones = np.asarray(sorted(set(opciones)), dtype=int)
+    n_dias, n_opc = entradas.size, opciones.size
+    # Output de cada opción de turnos para cada día: (opciones, días)
+    outputs = output_objetivo(entradas, es_domingo, opciones, cap_ar_por_turno, lt_pct, surf_capa_pct,
+                              outputs_fijos_tres_turnos)
+
+    resolucion = float(resolucion or umbral / 200)
+    wip_tope = float(wip_tope or max(wip_inicial, umbral) + 2 * entradas.max(initial=0))
+    n_cub = int(np.ceil(wip_tope / resolucion)) + 1
+    # Penalización por día sobre el umbral: mayor que cualquier total de turnos
+    penal = int(opciones.max()) * n_dias + 1
+
+    costo = np.full(n_cub, np.iinfo(np.int64).max)
+    wip = np.zeros(n_cub)
+    b0 = min(int(wip_inicial // resolucion), n_cub - 1)
+    costo[b0], wip[b0] = 0, float(wip_inicial)
+    previo = np.zeros((n_dias, n_cub), dtype=np.int32)
+    eleccion = np.zeros((n_dias, n_cub), dtype=np.int8)
+
+    for d in range(n_dias):
+        vivos = np.flatnonzero(costo < np.iinfo(np.int64).max)
+        nuevo_wip = np.maximum(wip[vivos, None] + entradas[d] - outputs[None, :, d], 0.0)     # (vivos, opciones)
+        nuevo_costo = costo[vivos, None] + (nuevo_wip > umbral) * penal + opciones[None, :]
+        destino = np.minimum((nuevo_wip // resolucion).astype(np.int64), n_cub - 1)
+
+        destino, nuevo_costo, nuevo_wip = destino.ravel(), nuevo_costo.ravel(), nuevo_wip.ravel()
+        # Por cubeta destino, el candidato de menor costo y luego menor WIP
+        orden = np.lexsort((nuevo_wip, nuevo_costo, destino))
+        cubetas, primero = np.unique(destino[orden], return_index=True)
+        elegido = orden[primero]
+
+        costo = np.full(n_cub, np.iinfo(np.int64).max)
+        costo[cubetas] = nuevo_costo[elegido]
+        wip[cubetas] = nuevo_wip[elegido]
+        previo[d, cubetas] = vivos[elegido // n_opc]
+        eleccion[d, cubetas] = elegido % n_opc
+
+    final = np.lexsort((wip, costo))[0]
+    indice = np.empty(n_dias, dtype=int)
+    for d in range(n_dias - 1, -1, -1):
+        indice[d] = eleccion[d, final]
+        final = previo[d, final]
+
+    turnos = opciones[indice]
+    output = outputs[indice, np.arange(n_dias)]
+    wip_end = simular_wip(wip_inicial, entradas, output, umbral=None).wip_end[0]
+    return ResultadoPlan(turnos, output, wip_end, float(turnos.sum() * horas_por_turno), int((wip_end > umbral).sum()))
@@ -0,0 +1,219 @@
+"""Capacidad de varias plantas y líneas desde archivos de configuración.
+
+Cada línea es un JSON en `DIRECTORIO_PLANTAS/<planta>/<línea>.json`:
+
+    {
+      "planta": "Principal", "linea": "SURF", "estaciones": "SURF",
+      "oee": 0.80, "turnos": 3, "horas_turno": 7, "scrap": 0.0, "fraccion": 1.0
+    }
+
+`estaciones` es el nombre de una línea de `lineas.py` o la lista de
+estaciones con el mismo formato; "planta" y "linea" toman por defecto el
+nombre de la carpeta y del archivo. `fraccion` es la parte de los trabajos
+de la planta que pasa por la línea (p. ej. solo una parte lleva AR): la
+capacidad de la planta es el mínimo de capacidad/fracción entre sus
+líneas, y la línea que da ese mínimo es la restricción de la planta.
+
+Los resultados se guardan por archivo (firma mtime/tamaño y, si cambió, el
+hash del contenido): al editar una línea solo esa se vuelve a leer y
+calcular. Los archivos nuevos o modificados se leen en paralelo con hilos
+y todas las líneas a recalcular se evalúan en una sola llamada vectorizada
+de `calcular_capacidad` (OEE, turnos, horas y scrap por línea).
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from capacidad import calcular_capacidad, construir_modelo, estaciones_de_linea
+from ingesta import hash_contenido
+from lineas import LINEAS, validar_estaciones
+
+DIRECTORIO_PLANTAS = Path(os.environ.get("CAPACIDAD_PLANTAS_DIR", Path(__file__).with_name("configuracion_plantas")))
+_POR_DEFECTO = {"oee": 0.80, "turnos": 3, "horas_turno": 7, "scrap": 0.0, "fraccion": 1.0}
+
+
+class ConfigLinea(NamedTuple):
+    planta: str
+    linea: str
+    estaciones: list
+    oee: float
+    turnos: float
+    horas_turno: float
+    scrap: float
+    fraccion: float
+
+
+class ResultadoLinea(NamedTuple):
+    config: ConfigLinea
+    estaciones: list            # "icono nombre" por estación
+    cap_hora: np.ndarray        # (estaciones,)
+    cap_diaria: np.ndarray      # (estaciones,)
+    cap_linea: float
+    cuello: int                 # índice local de la estación cuello de botella
+
+
+class ResumenPlantas(NamedTuple):
+    plantas: pd.DataFrame       # una fila por planta con su línea restrictiva
+    lineas: pd.DataFrame        # una fila por línea
+    estaciones: pd.DataFrame    # una fila por estación de todas las líneas
+    recalculadas: list          # rutas leídas y calculadas en esta llamada
+    errores: dict               # ruta -> mensaje de los archivos inválidos
+
+
+class _Entrada(NamedTuple):
+    firma: tuple                # (mtime_ns, tamaño)
+    hash: str
+    resultado: ResultadoLinea   # None si el archivo es inválido
+    error: str                  # None si es válido
+
+
+# Caché del proceso: ruta -> _Entrada (compartida entre sesiones de Streamlit)
+_cache = {}
+_bloqueo = threading.Lock()
+
+
+def leer_config(datos, ruta):
+    """ConfigLinea desde los bytes de un JSON; lanza ValueError/TypeError si es inválido."""
+    crudo = json.loads(datos)
+    if not isinstance(crudo, dict):
+        raise ValueError("se esperaba un objeto JSON")
+    estaciones = crudo.get("estaciones", crudo.get("linea", ruta.stem))
+    if isinstance(estaciones, str):
+        if estaciones not in LINEAS:
+            raise ValueError(f"línea desconocida {estaciones!r}; opciones: {', '.join(LINEAS)} o una lista de estaciones")
+        estaciones = LINEAS[estaciones]
+    validar_estaciones(estaciones)
+    p = {k: float(crudo.get(k, v)) for k, v in _POR_DEFECTO.items()}
+    if not 0 < p["fraccion"] <= 1:
+        raise ValueError("fraccion debe estar en (0, 1]")
+    return ConfigLinea(str(crudo.get("planta", ruta.parent.name)), str(crudo.get("linea", ruta.stem)), estaciones, **p)
+
+
+def _leer(ruta):
+    # (firma, hash, config, error); corre en los hilos del pool
+    try:
+        estado = ruta.stat()
+        datos = ruta.read_bytes()
+    except OSError as e:
+        return None, None, None, str(e)
+    firma = (estado.st_mtime_ns, estado.st_size)
+    clave = hash_contenido(datos)
+    try:
+        return firma, clave, leer_config(datos, ruta), None
+    except (ValueError, KeyError, TypeError) as e:
+        return firma, clave, None, f"{type(e).__name__}: {e}"
+
+
+def evaluar_lineas(configs):
+    """ResultadoLinea de cada config, todas en una sola evaluación del motor de capacidad."""
+    if not configs:
+        return []
+    modelo = construir_modelo({k: c.estaciones for k, c in enumerate(configs)})
+    por_linea = {k: np.array([getattr(c, k) for c in configs]) for k in ("oee", "turnos", "horas_turno", "scrap")}
+    res = calcular_capacidad(modelo, por_linea["oee"], por_linea["turnos"], por_linea["horas_turno"], por_linea["scrap"])
+    resultados = []
+    for l, c in enumerate(configs):
+        rango = estaciones_de_linea(modelo, l)
+        nombres = [f"{i} {n}".strip() for i, n in zip(modelo.iconos[rango], modelo.estaciones[rango])]
+        resultados.append(ResultadoLinea(
+            c, nombres, res.cap_hora[rango].copy(), res.cap_diaria[rango].copy(),
+            float(res.cap_linea[l]), int(res.cuello[l] - rango.start),
+        ))
+    return resultados
+
+
+def _actualizar_cache(directorio, rutas, max_hilos):
+    # Relee solo los archivos cuya firma cambió; recalcula solo los de contenido nuevo
+    pendientes = []
+    for ruta in rutas:
+        entrada = _cache.get(ruta)
+        try:
+            estado = ruta.stat()
+        except OSError:
+            continue
+        if entrada is None or entrada.firma != (estado.st_mtime_ns, estado.st_size):
+            pendientes.append(ruta)
+    if len(pendientes) > 1 and max_hilos != 1:
+        with ThreadPoolExecutor(max_workers=max_hilos or min(32, len(pendientes))) as pool:
+            leidos = list(pool.map(_leer, pendientes))
+    else:
+        leidos = [_leer(r) for r in pendientes]
+
+    nuevos = []
+    for ruta, (firma, clave, config, error) in zip(pendientes, leidos):
+        previa = _cache.get(ruta)
+        if previa is not None and clave is not None and previa.hash == clave:
+            _cache[ruta] = previa._replace(firma=firma)  # tocado pero sin cambios: mismo resultado
+        elif config is None:
+            _cache[ruta] = _Entrada(firma, clave, None, error)
+        else:
+            nuevos.append((ruta, firma, clave, config))
+
+    for (ruta, firma, clave, _), resultado in zip(nuevos, evaluar_lineas([n[3] for n in nuevos])):
+        _cache[ruta] = _Entrada(firma, clave, resultado, None)
+    vigentes = set(rutas)
+    for ruta in [r for r in _cache if directorio in r.parents and r not in vigentes]:
+        del _cache[ruta]  # archivo borrado
+    return [n[0] for n in nuevos]
+
+
+def _tablas(resultados):
+    filas_lineas, filas_estaciones = [], []
+    for r in resultados:
+        c = r.config
+        filas_lineas.append({
+            "Planta": c.planta, "Línea": c.linea, "Capacidad línea (lentes/día)": r.cap_linea,
+            "Fracción de trabajos": c.fraccion, "Capacidad equivalente planta": r.cap_linea / c.fraccion,
+            "Cuello de botella": r.estaciones[r.cuello], "OEE": c.oee, "Turnos": c.turnos,
+            "Horas por turno": c.horas_turno, "Scrap": c.scrap,
+        })
+        for k, nombre in enumerate(r.estaciones):
+            filas_estaciones.append({
+                "Planta": c.planta, "Línea": c.linea, "Estación": nombre,
+                "Capacidad hora (teórica)": r.cap_hora[k], "Capacidad diaria (real)": r.cap_diaria[k],
+                "Capacidad equivalente planta": r.cap_diaria[k] / c.fraccion, "Cuello de la línea": k == r.cuello,
+            })
+    lineas = pd.DataFrame(filas_lineas, columns=[
+        "Planta", "Línea", "Capacidad línea (lentes/día)", "Fracción de trabajos", "Capacidad equivalente planta",
+        "Cuello de botella", "OEE", "Turnos", "Horas por turno", "Scrap",
+    ])
+    estaciones = pd.DataFrame(filas_estaciones, columns=[
+        "Planta", "Línea", "Estación", "Capacidad hora (teórica)", "Capacidad diaria (real)",
+        "Capacidad equivalente planta", "Cuello de la línea",
+    ])
+
+    # Restricción de cada planta: la línea con menor capacidad equivalente (primera en empate)
+    idx = lineas.groupby("Planta", sort=True)["Capacidad equivalente planta"].idxmin()
+    restrictivas = lineas.loc[idx.to_numpy()]
+    plantas = pd.DataFrame({
+        "Planta": restrictivas["Planta"].to_numpy(),
+        "Capacidad planta (lentes/día)": restrictivas["Capacidad equivalente planta"].to_numpy(),
+        "Línea restrictiva": restrictivas["Línea"].to_numpy(),
+        "Cuello de botella": restrictivas["Cuello de botella"].to_numpy(),
+        "Líneas": lineas.groupby("Planta", sort=True).size().to_numpy(),
+    })
+    lineas["Restricción de la planta"] = lineas.index.isin(idx.to_numpy())
+    return plantas, lineas, estaciones
+
+
+def evaluar_plantas(directorio=DIRECTORIO_PLANTAS, max_hilos=None):
+    """Resumen de todas las plantas y líneas configuradas en `directorio`.
+
+    Solo se leen y calculan los archivos nuevos o modificados desde la
+    llamada anterior; `max_hilos=1` lee en serie.
+    """
+    directorio = Path(directorio)
+    rutas = sorted(directorio.rglob("*.json")) if directorio.is_dir() else []
+    with _bloqueo:
+        recalculadas = _actualizar_cache(directorio, rutas, max_hilos)
+        entradas = [_cache[r] for r in rutas if r in _cache]
+        errores = {str(r): _cache[r].error for r in rutas if r in _cache and _cache[r].error}
+    resultados = [e.resultado for e in entradas if e.resultado is not None]
+    plantas, lineas, estaciones = _tablas(resultados)
+    return ResumenPlantas(plantas, lineas, estaciones, [str(r) for r in recalculadas], errores)
@@ -0,0 +1,150 @@
+"""Almacén local de series de tiempo (entradas y outputs por línea) en SQLite.
+
+Cada punto es (línea, variable, instante, valor) con clave primaria en ese
+orden en una tabla WITHOUT ROWID: la tabla queda ordenada físicamente por
+línea/variable/tiempo y una consulta por rango de fechas lee solo la ventana
+pedida. Sirve igual para series diarias u horarias; los instantes se guardan
+como segundos Unix.
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RUTA_POR_DEFECTO = Path(os.environ.get("CAPACIDAD_SERIES_DB", Path(__file__).with_name("datos") / "series.sqlite"))
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    linea TEXT NOT NULL,
+    variable TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    valor REAL,
+    PRIMARY KEY (linea, variable, ts)
+) WITHOUT ROWID
+"""
+
+# Datos con los que arrancó el tab WIP (diciembre 2025, línea AR); se cargan
+# solo si el almacén está vacío.
+SEMILLA_DICIEMBRE = {
+    "linea": "AR",
+    "desde": "2025-12-01",
+    "entradas": [
+        905, 1355, 1382, 1363, 1514, 2106, 315, 873, 942, 817, 760, 797, 813, 243, 880, 790, 900, 662, 748, 620,
+        99, 668, 742, 623, 0, 641, 400, 94
+    ],
+    # Output fijo para 3 turnos
+    "output_3_turnos": [
+        900, 900, 1150, 1150, 1150, 1150, 500, 1150, 1150, 1150, 1150, 1150, 1150, 500,
+        870, 840, 877, 798, 826, 784, 0, 800, 824, 785, 0, 631, 612, 587
+    ],
+}
+
+
+# Variables que el tab WIP lee del almacén
+VARIABLES_WIP = ("entradas", "output_3_turnos")
+
+
+def leer_csv_series(fuente, variables=VARIABLES_WIP):
+    """DataFrame (índice de fechas) con las columnas de `variables` presentes en un CSV.
+
+    Lanza ValueError si falta la columna "fecha", si no hay ninguna de
+    `variables` o si hay fechas o valores que no se pueden leer.
+    """
+    try:
+        df = pd.read_csv(fuente)
+    except (pd.errors.ParserError, UnicodeDecodeError, pd.errors.EmptyDataError) as e:
+        raise ValueError(f"no se pudo leer el CSV ({e})") from e
+    if "fecha" not in df.columns:
+        raise ValueError("falta la columna 'fecha'")
+    columnas = [c for c in variables if c in df.columns]
+    if not columnas:
+        raise ValueError(f"el CSV no tiene ninguna de las columnas {', '.join(variables)}")
+    fechas = pd.to_datetime(df["fecha"], errors="coerce")
+    if fechas.isna().any():
+        raise ValueError(f"{int(fechas.isna().sum())} fechas no se pudieron leer")
+    valores = df[columnas].apply(pd.to_numeric, errors="coerce")
+    # Celdas vacías son NaN (sin dato); texto no numérico es un error
+    malos = valores.isna() & df[columnas].notna()
+    if malos.any().any():
+        raise ValueError(f"valores no numéricos en {', '.join(valores.columns[malos.any()])}")
+    return valores.set_index(pd.DatetimeIndex(fechas, name="fecha"))
+
+
+def _a_segundos(fechas):
+    return pd.DatetimeIndex(pd.to_datetime(fechas)).as_unit("s").asi8
+
+
+class AlmacenSeries:
+    """Acceso al archivo SQLite; abre una conexión por operación (seguro entre hilos)."""
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self._conectar() as con:
+            con.execute("PRAGMA journal_mode=WAL")  # lectores no se bloquean mientras se agrega
+            con.execute(_ESQUEMA)
+
+    @contextmanager
+    def _conectar(self):
+        con = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            with con:  # commit o rollback
+                yield con
+        finally:
+            con.close()
+
+    def agregar(self, linea, variable, fechas, valores):
+        """Agrega (o reemplaza) puntos; es incremental, no reescribe la serie."""
+        ts = _a_segundos(fechas)
+        valores = np.asarray(valores, dtype=float)
+        filas = zip([linea] * len(ts), [variable] * len(ts), ts.tolist(),
+                    [None if np.isnan(v) else v for v in valores.tolist()])
+        with self._conectar() as con:
+            con.executemany("INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)", filas)
+
+    def agregar_tabla(self, linea, df):
+        """Agrega cada columna de `df` (índice de fechas) como una variable."""
+        for variable in df.columns:
+            self.agregar(linea, variable, df.index, df[variable].to_numpy(dtype=float))
+
+    def consultar(self, linea, variable, desde=None, hasta=None):
+        """Serie (índice de fechas) de `variable` en [desde, hasta], ambos inclusive."""
+        inicio = -2 ** 62 if desde is None else int(_a_segundos([desde])[0])
+        fin = 2 ** 62 if hasta is None else int(_a_segundos([hasta])[0])
+        with self._conectar() as con:
+            filas = con.execute(
+                "SELECT ts, valor FROM series WHERE linea = ? AND variable = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                (linea, variable, inicio, fin),
+            ).fetchall()
+        ts = np.fromiter((f[0] for f in filas), dtype=np.int64, count=len(filas))
+        valores = np.fromiter((np.nan if f[1] is None else f[1] for f in filas), dtype=float, count=len(filas))
+        return pd.Series(valores, index=pd.to_datetime(ts, unit="s"), name=variable)
+
+    def consultar_tabla(self, linea, variables, desde=None, hasta=None):
+        """Varias variables alineadas por fecha (NaN donde falte alguna)."""
+        return pd.concat([self.consultar(linea, v, desde, hasta) for v in variables], axis=1)
+
+    def lineas(self):
+        with self._conectar() as con:
+            return [f[0] for f in con.execute("SELECT DISTINCT linea FROM series ORDER BY linea")]
+
+    def rango(self, linea, variable):
+        """(primera, última) fecha de la serie, o None si no existe."""
+        with self._conectar() as con:
+            minimo, maximo = con.execute(
+                "SELECT MIN(ts), MAX(ts) FROM series WHERE linea = ? AND variable = ?", (linea, variable)
+            ).fetchone()
+        if minimo is None:
+            return None
+        return pd.to_datetime(minimo, unit="s"), pd.to_datetime(maximo, unit="s")
+
+    def sembrar(self, semilla=SEMILLA_DICIEMBRE):
+        """Carga la semilla si el almacén está vacío."""
+        if self.lineas():
+            return
+        fechas = pd.date_range(semilla["desde"], periods=len(semilla["entradas"]), freq="D")
+        self.agregar(semilla["linea"], "entradas", fechas, semilla["entradas"])
+        self.agregar(semilla["linea"], "output_3_turnos", fechas, semilla["output_3_turnos"])
@@ -0,0 +1,239 @@
+"""Simulación de eventos discretos de una línea de estaciones en serie.
+
+Cada máquina es un servidor; entre estaciones hay buffers finitos y una
+máquina que termina con el buffer siguiente lleno queda bloqueada con el
+trabajo hasta que se libera un lugar (bloqueo después del servicio).
+Un trabajo es una bandeja de `lentes_por_job` lentes.
+
+El motor usa un heap de fin de servicio y registros compactos (`array`) por
+trabajo y por servidor; no construye DataFrames durante la simulación.
+El tiempo está en horas productivas (sin calendario de turnos).
+"""
+import heapq
+from array import array
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ResultadoEventos(NamedTuple):
+    estaciones: list            # nombres, en orden de flujo
+    lead_time: np.ndarray       # (trabajos terminados,) horas desde la llegada
+    lentes_terminados: int
+    horas: float                # tiempo simulado
+    throughput: float           # lentes/hora terminados
+    utilizacion: np.ndarray     # (estaciones,) fracción de tiempo procesando
+    bloqueo: np.ndarray         # (estaciones,) fracción bloqueada (buffer siguiente lleno)
+    inanicion: np.ndarray       # (estaciones,) fracción ociosa sin trabajo
+    tiempos_muestreo: np.ndarray  # (muestras,) horas, cada `paso_muestreo`
+    colas: np.ndarray           # (muestras, estaciones) trabajos en el buffer de entrada
+
+
+def _flujo_servicio(rng, cv, tam_bloque=65536):
+    # Multiplicadores de tiempo de servicio con media 1 (lognormal) generados por bloques
+    if cv <= 0:
+        while True:
+            yield 1.0
+    sigma = np.sqrt(np.log1p(cv ** 2))
+    while True:
+        yield from rng.lognormal(-sigma ** 2 / 2, sigma, tam_bloque).tolist()
+
+
+def simular_linea(estaciones, oee=1.0, lentes=100_000, horas=None, lentes_por_job=2,
+                  tasa_llegada=None, buffer=20, cv_servicio=0.0, paso_muestreo=1.0, semilla=0):
+    """Simula la línea hasta terminar `lentes` o alcanzar `horas`.
+
+    `estaciones` usa la misma estructura que `ESTACIONES_SURF` (name,
+    machines con type, count, capacity en lentes/hora); las máquinas con
+    capacidad 0 se ignoran. Cada servidor procesa un trabajo en
+    `lentes_por_job / (capacity × oee)` horas, multiplicado por un factor
+    lognormal de CV `cv_servicio`.
+
+    `tasa_llegada` en lentes/hora genera llegadas de Poisson a una cola de
+    entrada ilimitada; con `None` la línea está saturada (todo el trabajo
+    disponible en t=0) y el lead time se mide desde la entrada a la primera
+    estación. `buffer` es la capacidad (en trabajos) de cada buffer
+    entre estaciones: un entero o una lista por estación (el primer valor se
+    ignora porque la cola de entrada no tiene límite).
+    """
+    rng = np.random.default_rng(semilla)
+    nombres = [e["name"] for e in estaciones]
+    n_est = len(estaciones)
+    ultima = n_est - 1
+
+    # Servidores: estación y tiempo de servicio nominal de cada máquina
+    est_servidor = []
+    servicio = []
+    for k, estacion in enumerate(estaciones):
+        for m in estacion["machines"]:
+            if m["capacity"] > 0:
+                for _ in range(int(m["count"])):
+                    est_servidor.append(k)
+                    servicio.append(lentes_por_job / (m["capacity"] * oee))
+    con_servidor = set(est_servidor)
+    sin_capacidad = [nombres[k] for k in range(n_est) if k not in con_servidor]
+    if sin_capacidad:
+        raise ValueError(f"Cada estación necesita al menos una máquina con capacidad > 0 (sin capacidad: {', '.join(sin_capacidad)})")
+    n_serv = len(servicio)
+
+    capacidad_buffer = [buffer] * n_est if np.ndim(buffer) == 0 else list(buffer)
+    n_jobs = int(np.ceil(lentes / lentes_por_job))
+    if tasa_llegada:
+        llegadas = np.cumsum(rng.exponential(lentes_por_job / tasa_llegada, n_jobs)).tolist()
+    else:
+        llegadas = [0.0] * n_jobs
+    limite = float("inf") if horas is None else float(horas)
+
+    salida = array("d", [0.0]) * n_jobs
+    entrada = array("d", [0.0]) * n_jobs  # inicio en la primera estación
+    ocupado = [0.0] * n_serv
+    bloqueado = [0.0] * n_serv
+    inicio_bloqueo = [0.0] * n_serv
+    job_de = [0] * n_serv
+    libres = [[] for _ in range(n_est)]
+    for s in reversed(range(n_serv)):
+        libres[est_servidor[s]].append(s)
+    colas = [deque() for _ in range(n_est)]
+    bloqueados = [deque() for _ in range(n_est)]  # servidores de k-1 esperando lugar en k
+    heap = []
+    factor = _flujo_servicio(rng, cv_servicio).__next__
+    muestras_t = array("d")
+    muestras_q = array("q")
+
+    push, pop = heapq.heappush, heapq.heappop
+
+    def iniciar(s, j, t):
+        dur = servicio[s] * factor()
+        if est_servidor[s] == 0:
+            entrada[j] = t
+        job_de[s] = j
+        ocupado[s] += dur
+        push(heap, (t + dur, s))
+
+    def liberar(s, t):
+        # El servidor s queda libre: toma trabajo de su buffer y, si eso abre
+        # un lugar, desbloquea en cascada a la estación anterior.
+        while True:
+            k = est_servidor[s]
+            s2 = -1
+            cola = colas[k]
+            espera = bloqueados[k]
+            if cola:
+                j = cola.popleft()
+                if espera:
+                    s2 = espera.popleft()
+                    cola.append(job_de[s2])
+            elif espera:
+                s2 = espera.popleft()
+                j = job_de[s2]
+            else:
+                libres[k].append(s)
+                return
+            # iniciar(s, j, t) en línea
+            dur = servicio[s] * factor()
+            if k == 0:
+                entrada[j] = t
+            job_de[s] = j
+            ocupado[s] += dur
+            push(heap, (t + dur, s))
+            if s2 < 0:
+                return
+            bloqueado[s2] += t - inicio_bloqueo[s2]
+            s = s2
+
+    terminados = 0
+    siguiente = 0
+    t = 0.0
+    proxima_muestra = 0.0
+    if not tasa_llegada:
+        # Línea saturada: todos los trabajos llegan en t=0; se cargan de una vez
+        # (mismo orden que procesarlos como eventos) en lugar de uno por iteración
+        muestras_t.append(0.0)
+        muestras_q.extend(0 for _ in colas)
+        proxima_muestra = paso_muestreo
+        while siguiente < n_jobs and libres[0]:
+            iniciar(libres[0].pop(), siguiente, 0.0)
+            siguiente += 1
+        colas[0].extend(range(siguiente, n_jobs))
+        siguiente = n_jobs
+    while terminados < n_jobs:
+        # Próximo evento: llegada o fin de servicio, el que ocurra primero
+        if siguiente < n_jobs and (not heap or llegadas[siguiente] <= heap[0][0]):
+            t = llegadas[siguiente]
+            es_llegada = True
+        elif heap:
+            t = heap[0][0]
+            es_llegada = False
+        else:
+            break
+        if t > limite:
+            t = limite
+            break
+        while proxima_muestra <= t:
+            muestras_t.append(proxima_muestra)
+            muestras_q.extend(len(c) for c in colas)
+            proxima_muestra += paso_muestreo
+
+        if es_llegada:
+            if libres[0]:
+                iniciar(libres[0].pop(), siguiente, t)
+            else:
+                colas[0].append(siguiente)
+            siguiente += 1
+            continue
+
+        _, s = pop(heap)
+        k = est_servidor[s]
+        j = job_de[s]
+        if k == ultima:
+            salida[j] = t
+            terminados += 1
+            liberar(s, t)
+        elif libres[k + 1]:
+            # iniciar() en línea: la estación k + 1 nunca es la primera
+            s2 = libres[k + 1].pop()
+            dur = servicio[s2] * factor()
+            job_de[s2] = j
+            ocupado[s2] += dur
+            push(heap, (t + dur, s2))
+            liberar(s, t)
+        elif len(colas[k + 1]) < capacidad_buffer[k + 1]:
+            colas[k + 1].append(j)
+            liberar(s, t)
+        else:
+            inicio_bloqueo[s] = t
+            bloqueados[k + 1].append(s)
+
+    horas_sim = t if t > 0 else 1.0
+    # Servicio en curso al cortar: solo cuenta lo ya transcurrido
+    for fin, s in heap:
+        ocupado[s] -= max(fin - horas_sim, 0.0)
+    for cola in bloqueados:
+        for s in cola:
+            bloqueado[s] += horas_sim - inicio_bloqueo[s]
+
+    est = np.asarray(est_servidor)
+    n_por_est = np.bincount(est, minlength=n_est)
+    utilizacion = np.bincount(est, weights=ocupado, minlength=n_est) / (n_por_est * horas_sim)
+    bloqueo = np.bincount(est, weights=bloqueado, minlength=n_est) / (n_por_est * horas_sim)
+    inanicion = np.clip(1.0 - utilizacion - bloqueo, 0.0, 1.0)
+
+    # Lead time desde la llegada; en línea saturada, desde la entrada a la línea
+    salida_np = np.frombuffer(salida, dtype=float)
+    hecho = salida_np > 0
+    origen = np.asarray(llegadas) if tasa_llegada else np.frombuffer(entrada, dtype=float)
+    lead_time = salida_np[hecho] - origen[hecho]
+
+    return ResultadoEventos(
+        estaciones=nombres,
+        lead_time=lead_time,
+        lentes_terminados=terminados * lentes_por_job,
+        horas=horas_sim,
+        throughput=terminados * lentes_por_job / horas_sim,
+        utilizacion=utilizacion,
+        bloqueo=bloqueo,
+        inanicion=inanicion,
+        tiempos_muestreo=np.frombuffer(muestras_t, dtype=float).copy(),
+        colas=np.frombuffer(muestras_q, dtype=np.int64).reshape(-1, n_est).copy(),
+    )
@@ -0,0 +1,153 @@
+"""Motor vectorizado de la Simulación WIP.
+
+Evalúa miles de escenarios (filas) × días (columnas) en una sola llamada.
+No depende de Streamlit para poder usarse desde el dashboard o desde
+procesos batch.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+UMBRAL_WIP = 1000
+
+
+class ResultadoWIP(NamedTuple):
+    wip_start: np.ndarray       # (escenarios, días) WIP al inicio del día
+    salidas: np.ndarray         # (escenarios, días) salidas reales
+    wip_end: np.ndarray         # (escenarios, días) WIP al final del día
+    dia_estabilizacion: np.ndarray  # (escenarios,) índice del día, -1 si nunca
+
+
+def _como_columna(valor, n_escenarios):
+    # Escalar o vector (escenarios,) -> columna (escenarios, 1) para broadcasting
+    arr = np.asarray(valor, dtype=float)
+    if arr.ndim == 0:
+        return np.full((n_escenarios, 1), float(arr))
+    return arr.reshape(-1, 1)
+
+
+def output_objetivo(entradas, es_domingo, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct,
+                    outputs_fijos_tres_turnos, dias_arranque=3, output_arranque=600.0,
+                    output_domingo=500.0):
+    """Output objetivo diario (escenarios × días) según la regla del tab WIP.
+
+    Con 3 turnos se usa el output fijo (los días sin plan, NaN, siguen la
+    regla dinámica); con 1, 2 o 4 turnos se usa
+    `output_arranque` los primeros días, `output_domingo` los domingos y
+    `cap_ar_dia + entradas × (LT + SURF+CAPA)` el resto.
+    Los parámetros pueden ser escalares o vectores de longitud escenarios.
+    """
+    entradas = np.atleast_2d(np.asarray(entradas, dtype=float))
+    n_dias = entradas.shape[1]
+    n_escenarios = max(
+        entradas.shape[0],
+        *(np.size(p) for p in (turnos, cap_ar_por_turno, lt_pct, surf_capa_pct)),
+    )
+
+    turnos = _como_columna(turnos, n_escenarios)
+    cap_ar_dia = turnos * _como_columna(cap_ar_por_turno, n_escenarios)
+    pct = _como_columna(lt_pct, n_escenarios) + _como_columna(surf_capa_pct, n_escenarios)
+
+    dinamico = cap_ar_dia + entradas * pct
+    dinamico = np.where(np.asarray(es_domingo, dtype=bool), output_domingo, dinamico)
+    dinamico[:, :dias_arranque] = output_arranque
+
+    fijos = np.broadcast_to(np.asarray(outputs_fijos_tres_turnos, dtype=float), (n_escenarios, n_dias))
+    return np.where((turnos == 3) & ~np.isnan(fijos), fijos, dinamico)
+
+
+def dia_estabilizacion(wip_end, umbral=UMBRAL_WIP):
+    """Primer día desde el cual el WIP (fin de día) nunca supera `umbral`.
+
+    Usa el máximo acumulado en reversa: O(días) por escenario en lugar de
+    reescanear la cola para cada día. Devuelve -1 si nunca se estabiliza.
+    """
+    wip_end = np.atleast_2d(wip_end)
+    max_cola = np.maximum.accumulate(wip_end[:, ::-1], axis=1)[:, ::-1]
+    estable = max_cola <= umbral
+    return np.where(estable.any(axis=1), estable.argmax(axis=1), -1)
+
+
+def simular_wip(wip_inicial, entradas, output_obj, umbral=UMBRAL_WIP):
+    """Simula la evolución diaria del WIP para todos los escenarios a la vez.
+
+    - Salidas = min(WIP_start + Entradas, Output Objetivo)
+    - WIP_end = WIP_start + Entradas - Salidas (= WIP_start del día siguiente)
+
+    El bucle recorre solo los días; cada paso opera sobre todo el eje de
+    escenarios. Con `umbral=None` no se busca el día de estabilización
+    (queda en None).
+    """
+    output_obj = np.atleast_2d(np.asarray(output_obj, dtype=float))
+    n_escenarios = max(output_obj.shape[0], np.size(wip_inicial))
+    n_dias = output_obj.shape[1]
+    output_obj = np.broadcast_to(output_obj, (n_escenarios, n_dias))
+    entradas = np.broadcast_to(np.atleast_2d(np.asarray(entradas, dtype=float)), output_obj.shape)
+
+    wip_start = np.empty((n_escenarios, n_dias))
+    salidas = np.empty((n_escenarios, n_dias))
+    wip_end = np.empty((n_escenarios, n_dias))
+
+    actual = np.broadcast_to(np.asarray(wip_inicial, dtype=float), (n_escenarios,)).copy()
+    for i in range(n_dias):
+        wip_start[:, i] = actual
+        disponible = actual + entradas[:, i]
+        np.minimum(disponible, output_obj[:, i], out=salidas[:, i])
+        actual = disponible - salidas[:, i]
+        wip_end[:, i] = actual
+
+    return ResultadoWIP(wip_start, salidas, wip_end, None if umbral is None else dia_estabilizacion(wip_end, umbral))
+
+
+def simular_escenarios(entradas, es_domingo, outputs_fijos_tres_turnos, wip_inicial, turnos,
+                       cap_ar_por_turno, lt_pct, surf_capa_pct, umbral=UMBRAL_WIP):
+    """Atajo: output objetivo + simulación con los parámetros del tab WIP."""
+    output_obj = output_objetivo(
+        entradas, es_domingo, turnos, cap_ar_por_turno, lt_pct, surf_capa_pct,
+        outputs_fijos_tres_turnos,
+    )
+    return simular_wip(wip_inicial, entradas, output_obj, umbral=umbral)
+
+
+# Parámetros del tab WIP que se pueden barrer
+PARAMETROS_ESCENARIO = ("wip_inicial", "turnos", "cap_ar_por_turno", "lt_pct", "surf_capa_pct")
+
+
+class ResultadoBarrido(NamedTuple):
+    dia_estabilizacion: np.ndarray  # (len(valores_y), len(valores_x)), -1 si nunca
+    wip_max: np.ndarray             # pico de WIP fin de día
+    dias_arriba: np.ndarray         # días con WIP fin de día > umbral
+
+
+def barrido_parametros(base, param_x, valores_x, param_y, valores_y, entradas, es_domingo,
+                       outputs_fijos_tres_turnos, umbral=UMBRAL_WIP, tam_bloque=8192):
+    """Evalúa la rejilla `param_x` × `param_y` manteniendo el resto en `base`.
+
+    `base` es un dict con los cinco `PARAMETROS_ESCENARIO`. La rejilla se
+    simula por bloques de `tam_bloque` escenarios para acotar la memoria en
+    horizontes largos.
+    """
+    for nombre in (param_x, param_y):
+        if nombre not in PARAMETROS_ESCENARIO:
+            raise ValueError(f"Parámetro desconocido: {nombre}")
+    if param_x == param_y:
+        raise ValueError("Los dos parámetros del barrido deben ser distintos")
+
+    malla_x, malla_y = np.meshgrid(np.asarray(valores_x, dtype=float), np.asarray(valores_y, dtype=float))
+    n = malla_x.size
+    dia_est = np.empty(n, dtype=int)
+    wip_max = np.empty(n)
+    dias_arriba = np.empty(n, dtype=int)
+
+    for ini in range(0, n, tam_bloque):
+        bloque = slice(ini, min(ini + tam_bloque, n))
+        params = {nombre: base[nombre] for nombre in PARAMETROS_ESCENARIO}
+        params[param_x] = malla_x.ravel()[bloque]
+        params[param_y] = malla_y.ravel()[bloque]
+        r = simular_escenarios(entradas, es_domingo, outputs_fijos_tres_turnos, umbral=umbral, **params)
+        dia_est[bloque] = r.dia_estabilizacion
+        wip_max[bloque] = r.wip_end.max(axis=1)
+        dias_arriba[bloque] = (r.wip_end > umbral).sum(axis=1)
+
+    forma = malla_x.shape
+    return ResultadoBarrido(dia_est.reshape(forma), wip_max.reshape(forma), dias_arriba.reshape(forma))
@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+import cli
+
+
+@pytest.mark.parametrize("escenario, mensaje", [
+    ([1], "objeto JSON"),
+    ({"lineas": {}}, '"lineas" debe ser una lista'),
+    ({"lineas": [3]}, "lineas[0]"),
+    ({"lineas": [{"estaciones": "SURF"}]}, 'falta "nombre"'),
+    ({"lineas": [{"nombre": "X", "estaciones": [{"name": "A"}]}]}, "línea 'X': la estación 'A' no tiene 'machines'"),
+    ({"wip": [{"desde": "2025-12-01"}]}, 'wip[0]: falta "linea"'),
+])
+def test_escenario_invalido_da_error_sin_escribir(tmp_path, capsys, escenario, mensaje):
+    ruta = tmp_path / "escenario.json"
+    ruta.write_text(json.dumps(escenario), encoding="utf-8")
+
+    assert cli.main([str(ruta), "--salida", str(tmp_path / "reportes")]) == 1
+    assert mensaje in capsys.readouterr().err
+    assert not (tmp_path / "reportes").exists()
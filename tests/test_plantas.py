@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from plantas import evaluar_plantas
+
+
+def _escribir(ruta, contenido):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(contenido if isinstance(contenido, str) else json.dumps(contenido), encoding="utf-8")
+
+
+@pytest.mark.parametrize("malo", [
+    {"estaciones": [1]},
+    {"estaciones": [{"name": "X"}]},
+    {"estaciones": [{"name": "X", "machines": [3]}]},
+    {"estaciones": [{"name": "X", "machines": "PRA"}]},
+    {"estaciones": "NO_EXISTE"},
+    {"estaciones": "SURF", "fraccion": 0},
+    [1, 2],
+    "{",
+])
+def test_archivo_invalido_no_bloquea_las_demas_lineas(tmp_path, malo):
+    _escribir(tmp_path / "Norte" / "SURF.json", {"estaciones": "SURF"})
+    _escribir(tmp_path / "Norte" / "EM.json", {"linea": "E&M", "estaciones": "E&M", "oee": 0.85, "horas_turno": 8, "scrap": 0.05})
+    _escribir(tmp_path / "Norte" / "malo.json", malo)
+
+    resumen = evaluar_plantas(tmp_path, max_hilos=2)
+
+    assert list(resumen.errores) == [str(tmp_path / "Norte" / "malo.json")]
+    assert sorted(resumen.lineas["Línea"]) == ["E&M", "SURF"]
+    assert resumen.plantas["Línea restrictiva"].tolist() == ["E&M"]
+
+
+def test_solo_se_recalcula_la_linea_modificada(tmp_path):
+    surf, em = tmp_path / "Norte" / "SURF.json", tmp_path / "Norte" / "EM.json"
+    _escribir(surf, {"estaciones": "SURF"})
+    _escribir(em, {"linea": "E&M", "estaciones": "E&M"})
+    assert len(evaluar_plantas(tmp_path).recalculadas) == 2
+    assert evaluar_plantas(tmp_path).recalculadas == []
+
+    _escribir(em, {"linea": "E&M", "estaciones": "E&M", "turnos": 2})
+    assert evaluar_plantas(tmp_path).recalculadas == [str(em)]